@@ -10,5 +10,71 @@ class Settings(BaseSettings):
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", "test")
     JWT_ALGORITHM: str = os.getenv("JWT_ALGORITHM", "HS256")
     JWT_EXPIRE_MINUTES: int = int(os.getenv("JWT_EXPIRE_MINUTES", "60"))
+    # Authenticated-user cache used by get_current_user (0 disables)
+    USER_CACHE_TTL_SECONDS: float = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+    USER_CACHE_MAX_SIZE: int = int(os.getenv("USER_CACHE_MAX_SIZE", "1024"))
+    # Verified JWT claims keyed by token hash, so repeat requests skip the signature check;
+    # entries never outlive the token's exp (0 disables)
+    JWT_CLAIMS_CACHE_TTL_SECONDS: float = float(os.getenv("JWT_CLAIMS_CACHE_TTL_SECONDS", "300"))
+    JWT_CLAIMS_CACHE_MAX_SIZE: int = int(os.getenv("JWT_CLAIMS_CACHE_MAX_SIZE", "4096"))
+    # Attempts allowed per client IP and per email on login/register/change-password within a
+    # sliding window (0 disables a key). "memory" counts per process, "mongo" shares counters between workers, "none" disables
+    AUTH_RATE_LIMIT_BACKEND: str = os.getenv("AUTH_RATE_LIMIT_BACKEND", "memory")
+    AUTH_RATE_LIMIT_WINDOW_SECONDS: float = float(os.getenv("AUTH_RATE_LIMIT_WINDOW_SECONDS", "60"))
+    AUTH_RATE_LIMIT_PER_IP: int = int(os.getenv("AUTH_RATE_LIMIT_PER_IP", "20"))
+    AUTH_RATE_LIMIT_PER_EMAIL: int = int(os.getenv("AUTH_RATE_LIMIT_PER_EMAIL", "5"))
+    # bcrypt work factor for new hashes (each +1 doubles the time); hashes stored at another
+    # cost are rehashed on the next successful login. Pick it with scripts/calibrate_bcrypt.py
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    # Threads used for bcrypt hashing/verification outside the event loop
+    HASH_POOL_SIZE: int = int(os.getenv("HASH_POOL_SIZE", str(min(4, os.cpu_count() or 1))))
+    # Documents per cursor batch when streaming billing exports
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+    # How long billing delete tombstones are kept for the change feed
+    BILLING_TOMBSTONE_RETENTION_DAYS: int = int(os.getenv("BILLING_TOMBSTONE_RETENTION_DAYS", "30"))
+    # The change feed only returns changes older than this, so writes stamped by the app clock
+    # but committed a little later (or by a worker whose clock runs behind) are not skipped
+    BILLING_CHANGES_SAFETY_SECONDS: float = float(os.getenv("BILLING_CHANGES_SAFETY_SECONDS", "5"))
+    # Live billing events: "local" publishes from this process, "change_stream" tails MongoDB (replica set only)
+    BILLING_EVENTS_BACKEND: str = os.getenv("BILLING_EVENTS_BACKEND", "local")
+    BILLING_STREAM_QUEUE_SIZE: int = int(os.getenv("BILLING_STREAM_QUEUE_SIZE", "256"))
+    BILLING_STREAM_HEARTBEAT_SECONDS: float = float(os.getenv("BILLING_STREAM_HEARTBEAT_SECONDS", "15"))
+    # Answer /billing/summary from billing_daily_rollups (run scripts/rebuild_rollups.py before enabling)
+    BILLING_SUMMARY_FROM_ROLLUPS: bool = os.getenv("BILLING_SUMMARY_FROM_ROLLUPS", "false").lower() == "true"
+    # Serve list/get endpoints through app.responses.fast_response instead of response_model validation
+    FAST_JSON_RESPONSES: bool = os.getenv("FAST_JSON_RESPONSES", "false").lower() == "true"
+    # Drones/farmers/roles held in memory; reloaded on this interval and on a lookup miss
+    REFERENCE_CACHE_REFRESH_SECONDS: float = float(os.getenv("REFERENCE_CACHE_REFRESH_SECONDS", "60"))
+    REFERENCE_CACHE_MISS_REFRESH_SECONDS: float = float(os.getenv("REFERENCE_CACHE_MISS_REFRESH_SECONDS", "5"))
+    # Reject bills whose farmer_id/drone_id are not in the reference cache
+    VALIDATE_BILLING_REFERENCES: bool = os.getenv("VALIDATE_BILLING_REFERENCES", "false").lower() == "true"
+    # Mongo connection pool; MIN connections are opened at startup so the first requests do not pay for them
+    MONGO_MAX_POOL_SIZE: int = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+    MONGO_MIN_POOL_SIZE: int = int(os.getenv("MONGO_MIN_POOL_SIZE", "10"))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: int = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+    MONGO_CONNECT_TIMEOUT_MS: int = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "10000"))
+    # Summary and export reads go to secondaryPreferred; secondaries lagging more than this are skipped
+    # (MongoDB requires at least 90; -1 means no bound)
+    ANALYTICS_MAX_STALENESS_SECONDS: int = int(os.getenv("ANALYTICS_MAX_STALENESS_SECONDS", "90"))
+    # Prometheus metrics at /metrics: request latency per route and Mongo commands per request
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    # Mongo commands slower than this are logged and grouped by shape at /admin/slow-queries (0 disables);
+    # each shape is re-run with explain("executionStats") at most once per interval
+    SLOW_QUERY_THRESHOLD_MS: float = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "100"))
+    SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS: float = float(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS", "300"))
+    SLOW_QUERY_MAX_SHAPES: int = int(os.getenv("SLOW_QUERY_MAX_SHAPES", "500"))
+    # Months of bills kept in the hot billing collection; clean_database.py --tier moves older
+    # bills into monthly billing_YYYY_MM archives (0 disables tiering)
+    BILLING_HOT_MONTHS: int = int(os.getenv("BILLING_HOT_MONTHS", "0"))
+    # How long a process trusts its list of archive collections before re-checking the partitions
+    # version (0 checks on every read); archives made by another process show up within this delay
+    BILLING_PARTITIONS_CHECK_SECONDS: float = float(os.getenv("BILLING_PARTITIONS_CHECK_SECONDS", "5"))
+    # Largest `skip` for offset pages that span archives, which are merged in the API process;
+    # deeper pages must use the `after=` cursor
+    BILLING_MAX_ARCHIVE_SKIP: int = int(os.getenv("BILLING_MAX_ARCHIVE_SKIP", "10000"))
+    # Build declared indexes on startup; CHECK also explains service queries and flags COLLSCANs
+    ENSURE_INDEXES_ON_STARTUP: bool = os.getenv("ENSURE_INDEXES_ON_STARTUP", "true").lower() == "true"
+    CHECK_QUERY_PLANS_ON_STARTUP: bool = os.getenv("CHECK_QUERY_PLANS_ON_STARTUP", "false").lower() == "true"
 
 settings = Settings()
@@ -1,7 +1,73 @@
-from motor.motor_asyncio import AsyncIOMotorClient
+import asyncio
+import logging
+from typing import Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo.read_preferences import SecondaryPreferred
 from app.config import settings
+from app.metrics import MongoCommandListener
+from app.slow_queries import SlowQueryListener, slow_queries
+
+logger = logging.getLogger(__name__)
+
+# Created by connect() from the app lifespan (or a script); None until then
+client: Optional[AsyncIOMotorClient] = None
+db: Optional[AsyncIOMotorDatabase] = None
+# Same database, reading from secondaries when available (reports and exports)
+analytics_db: Optional[AsyncIOMotorDatabase] = None
+
+
+def create_client() -> AsyncIOMotorClient:
+    """Client with the pool sizing and timeouts from Settings."""
+    listeners = []
+    if settings.METRICS_ENABLED:
+        listeners.append(MongoCommandListener())
+    if slow_queries.enabled:
+        listeners.append(SlowQueryListener(slow_queries))
+    return AsyncIOMotorClient(
+        settings.MONGO_URL,
+        maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
+        minPoolSize=settings.MONGO_MIN_POOL_SIZE,
+        waitQueueTimeoutMS=settings.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        serverSelectionTimeoutMS=settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        connectTimeoutMS=settings.MONGO_CONNECT_TIMEOUT_MS,
+        event_listeners=listeners,
+    )
+
+
+async def warm_pool(mongo_client: AsyncIOMotorClient, connections: int) -> None:
+    """Open ``connections`` pooled sockets now instead of on the first requests."""
+    # Concurrent pings each check out their own connection
+    await asyncio.gather(*(mongo_client.admin.command("ping") for _ in range(connections)))
+
+
+async def connect() -> AsyncIOMotorDatabase:
+    """Create the client, check the server answers and pre-warm the pool."""
+    global client, db, analytics_db
+    client = create_client()
+    db = client[settings.DB_NAME]
+    analytics_db = client.get_database(
+        settings.DB_NAME,
+        read_preference=SecondaryPreferred(max_staleness=settings.ANALYTICS_MAX_STALENESS_SECONDS),
+    )
+    await client.admin.command("ping")
+    if settings.MONGO_MIN_POOL_SIZE > 1:
+        await warm_pool(client, settings.MONGO_MIN_POOL_SIZE)
+    logger.info("Connected to MongoDB (pool %d-%d)", settings.MONGO_MIN_POOL_SIZE, settings.MONGO_MAX_POOL_SIZE)
+    return db
+
+
+def close() -> None:
+    global client, db, analytics_db
+    if client is not None:
+        client.close()
+    client = db = analytics_db = None
+
 
-client = AsyncIOMotorClient(settings.MONGO_URL)
-db = client[settings.DB_NAME]
 async def get_db():
-    return db
\ No newline at end of file
+    return db
+
+
+async def get_analytics_db():
+    """Database for heavy read-only queries; may lag the primary by up to ANALYTICS_MAX_STALENESS_SECONDS."""
+    return analytics_db
@@ -1,10 +1,13 @@
-from fastapi import Depends, HTTPException, status
+from typing import List, Optional, Type
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError
 from app.security.jwt_handler import verify_token
-from app.models.user_model import get_user_collection
+from app.services.user_service import get_cached_user
 from app.db import get_db
-from bson import ObjectId
+from bson.errors import InvalidId
+from pydantic import BaseModel
+from app.responses import response_fields
 
 security = HTTPBearer()
 
@@ -29,8 +32,10 @@ async def get_current_user(
             detail="Invalid or expired token"
         )
     
-    users_collection = get_user_collection(db)
-    user = await users_collection.find_one({"_id": ObjectId(user_id)})
+    try:
+        user = await get_cached_user(user_id, db)
+    except InvalidId:
+        user = None
     
     if not user:
         raise HTTPException(
@@ -72,4 +77,24 @@ async def verify_user_or_admin(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied"
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+def sparse_fields(model: Type[BaseModel]):
+    """
+    Dependency parsing `?fields=a,b` into a list of `model` fields (stored names).
+    `_id` is always included; unknown fields are rejected with 400.
+    """
+    allowed = set(response_fields(model))
+
+    def dependency(
+        fields: Optional[str] = Query(None, description=f"Comma-separated subset of: {', '.join(sorted(allowed))}")
+    ) -> Optional[List[str]]:
+        if not fields:
+            return None
+        requested = ["_id" if name.strip() == "id" else name.strip() for name in fields.split(",") if name.strip()]
+        unknown = sorted(set(requested) - allowed)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        return ["_id"] + [name for name in dict.fromkeys(requested) if name != "_id"]
+
+    return dependency
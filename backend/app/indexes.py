@@ -0,0 +1,155 @@
+# Declarative index registry: each model module declares its indexes, this builds them
+import logging
+from datetime import datetime
+from typing import Any, Dict, List
+
+from pymongo import IndexModel
+from pymongo.errors import OperationFailure
+
+from app.models.billing_model import (
+    get_billing_collection,
+    get_billing_deletion_collection,
+    get_billing_rollup_collection,
+    BILLING_INDEXES,
+    BILLING_DELETION_INDEXES,
+    BILLING_ROLLUP_INDEXES,
+)
+from app.models.drone_model import get_drone_collection, DRONE_INDEXES
+from app.models.password_reset_model import get_password_reset_collection, PASSWORD_RESET_INDEXES
+from app.models.rate_limit_model import get_rate_limit_collection, RATE_LIMIT_INDEXES
+from app.models.role_model import get_role_collection, ROLE_INDEXES
+from app.models.user_model import get_user_collection, USER_INDEXES
+
+logger = logging.getLogger(__name__)
+
+# (collection getter, declared indexes)
+INDEX_REGISTRY = [
+    (get_user_collection, USER_INDEXES),
+    (get_role_collection, ROLE_INDEXES),
+    (get_drone_collection, DRONE_INDEXES),
+    (get_billing_collection, BILLING_INDEXES),
+    (get_billing_deletion_collection, BILLING_DELETION_INDEXES),
+    (get_billing_rollup_collection, BILLING_ROLLUP_INDEXES),
+    (get_password_reset_collection, PASSWORD_RESET_INDEXES),
+    (get_rate_limit_collection, RATE_LIMIT_INDEXES),
+]
+
+# Index options that change behaviour; anything else (v, ns, ...) is ignored when diffing
+_COMPARED_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression")
+
+# Representative query shapes issued by the services: (collection getter, filter, sort)
+QUERY_SHAPES = {
+    "auth.authenticate": (get_user_collection, {"email": "probe@example.com"}, None),
+    "auth.reset_password": (get_password_reset_collection, {"token": "probe", "used": False}, None),
+    "billing.list": (get_billing_collection, {}, [("created_at", -1), ("_id", -1)]),
+    "billing.list_by_operator": (get_billing_collection, {"operator_id": "probe"}, [("created_at", -1), ("_id", -1)]),
+    "billing.list_by_farmer": (get_billing_collection, {"farmer_id": "probe"}, [("created_at", -1), ("_id", -1)]),
+    "billing.list_by_drone": (get_billing_collection, {"drone_id": "probe"}, [("created_at", -1), ("_id", -1)]),
+    "billing.changes": (get_billing_collection, {"changed_at": {"$gt": datetime(2000, 1, 1)}}, [("changed_at", 1), ("_id", 1)]),
+    "billing.deletions": (get_billing_deletion_collection, {"deleted_at": {"$gt": datetime(2000, 1, 1)}}, [("deleted_at", 1)]),
+}
+
+
+def _key(spec) -> List[tuple]:
+    pairs = spec.items() if hasattr(spec, "items") else spec
+    # The server may report directions as floats (1.0); normalise numeric ones to int
+    return [
+        (field, int(direction) if isinstance(direction, (int, float)) else direction)
+        for field, direction in pairs
+    ]
+
+
+def _options(info: Dict[str, Any]) -> Dict[str, Any]:
+    # expireAfterSeconds=0 is meaningful, so only drop explicit False/None
+    return {
+        opt: info[opt] for opt in _COMPARED_OPTIONS
+        if opt in info and info[opt] is not False and info[opt] is not None
+    }
+
+
+def _diff(declared: List[IndexModel], existing: Dict[str, Dict[str, Any]]) -> Dict[str, List[str]]:
+    """Compare declared indexes with index_information() output."""
+    by_key = {tuple(_key(info["key"])): (name, info) for name, info in existing.items()}
+    missing, changed = [], []
+    declared_keys = set()
+
+    for model in declared:
+        doc = model.document
+        key = tuple(_key(doc["key"]))
+        declared_keys.add(key)
+        if key not in by_key:
+            missing.append(doc["name"])
+            continue
+        name, info = by_key[key]
+        if _options(info) != _options(doc):
+            changed.append(name)
+
+    undeclared = [
+        name for key, (name, _) in by_key.items()
+        if key not in declared_keys and name != "_id_"
+    ]
+    return {"missing": missing, "changed": changed, "undeclared": undeclared}
+
+
+async def index_drift(db) -> Dict[str, Dict[str, List[str]]]:
+    """Report missing, changed and undeclared indexes per collection without modifying anything."""
+    report = {}
+    for get_collection, declared in INDEX_REGISTRY:
+        coll = get_collection(db)
+        existing = await coll.index_information()
+        report[coll.name] = _diff(declared, existing)
+    return report
+
+
+async def ensure_indexes(db) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Create any missing declared indexes (idempotent) and return the drift report.
+    Indexes whose options changed are reported but never dropped automatically.
+    """
+    report = await index_drift(db)
+    for get_collection, declared in INDEX_REGISTRY:
+        coll = get_collection(db)
+        missing = set(report[coll.name]["missing"])
+        to_create = [model for model in declared if model.document["name"] in missing]
+        if not to_create:
+            continue
+        try:
+            await coll.create_indexes(to_create)
+            logger.info("Created indexes on %s: %s", coll.name, sorted(missing))
+        except OperationFailure as e:
+            # Same name with a different key, or same key with conflicting options
+            logger.error("Could not create indexes on %s: %s", coll.name, e)
+            continue
+        report[coll.name]["missing"] = []
+
+    for name, drift in report.items():
+        if drift["missing"] or drift["changed"] or drift["undeclared"]:
+            logger.warning("Index drift on %s: %s", name, drift)
+    return report
+
+
+def plan_stages(plan: Any):
+    """Yield every stage name found anywhere in an explain plan."""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from plan_stages(item)
+
+
+async def check_query_plans(db) -> Dict[str, Dict[str, Any]]:
+    """Run explain() on each registered query shape and flag the ones that still COLLSCAN."""
+    results = {}
+    for label, (get_collection, query, sort) in QUERY_SHAPES.items():
+        cursor = get_collection(db).find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        stages = sorted(set(plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {}))))
+        results[label] = {"stages": stages, "collscan": "COLLSCAN" in stages}
+        if results[label]["collscan"]:
+            logger.warning("Query %s uses a COLLSCAN", label)
+    return results
@@ -1,10 +1,46 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from app.config import settings
+from app import db as database
+from app.metrics import MetricsMiddleware, render_metrics
+from app.indexes import ensure_indexes, check_query_plans
+from app.security.hash import shutdown_hash_executor
+from app.services.billing_events import run_change_stream_publisher
+from app.services.reference_cache import reference_cache
+from app.slow_queries import slow_queries
 from app.routers.auth_router import router as auth_router
 from app.routers.users_router import router as users_router
 from app.routers.billing_router import router as billing_router
+from app.routers.reference_router import router as reference_router
+from app.routers.admin_router import router as admin_router
 
-app = FastAPI(title="Drone API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup/shutdown hooks"""
+    db = await database.connect()
+    if settings.ENSURE_INDEXES_ON_STARTUP:
+        await ensure_indexes(db)
+    if settings.CHECK_QUERY_PLANS_ON_STARTUP:
+        await check_query_plans(db)
+
+    background_tasks = [asyncio.create_task(reference_cache.run_periodic_refresh(db))]
+    if settings.BILLING_EVENTS_BACKEND == "change_stream":
+        background_tasks.append(asyncio.create_task(run_change_stream_publisher(db)))
+    if slow_queries.enabled:
+        background_tasks.append(asyncio.create_task(slow_queries.run_explainer(database.client)))
+
+    yield
+
+    for task in background_tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    shutdown_hash_executor()
+    database.close()
+
+app = FastAPI(title="Drone API", version="1.0.0", lifespan=lifespan)
 
 # CORS middleware for frontend integration
 app.add_middleware(
@@ -15,6 +51,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        body, content_type = render_metrics()
+        return Response(body, headers={"Content-Type": content_type})
+
 @app.get("/")
 def home():
     return {"message": "API is working for drone"}
@@ -22,4 +66,6 @@ def home():
 # Include route modules
 app.include_router(auth_router)
 app.include_router(users_router)
-app.include_router(billing_router)
\ No newline at end of file
+app.include_router(billing_router)
+app.include_router(reference_router)
+app.include_router(admin_router)
\ No newline at end of file
@@ -0,0 +1,186 @@
+# Prometheus metrics: request latency per route template and Mongo commands attributed to the request that ran them
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from pymongo import monitoring
+
+# Label for Mongo commands that run outside a request (startup, background tasks)
+BACKGROUND = "background"
+# Label for requests that matched no route, so unknown paths do not create new series
+UNMATCHED = "unmatched"
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template and status",
+    ["method", "route", "status"],
+)
+REQUEST_MONGO_COMMANDS = Histogram(
+    "http_request_mongo_commands",
+    "Mongo commands issued per HTTP request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+REQUEST_MONGO_SECONDS = Histogram(
+    "http_request_mongo_seconds",
+    "Time spent in Mongo commands per HTTP request",
+    ["method", "route"],
+)
+MONGO_COMMANDS = Counter(
+    "mongo_commands_total",
+    "Mongo commands by route, command name and outcome",
+    ["route", "command", "outcome"],
+)
+MONGO_COMMAND_SECONDS = Histogram(
+    "mongo_command_duration_seconds",
+    "Mongo command duration by route and command name",
+    ["route", "command"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+MONGO_DOCUMENTS_RETURNED = Counter(
+    "mongo_documents_returned_total",
+    "Documents returned by Mongo commands by route and command name",
+    ["route", "command"],
+)
+RATE_LIMITED = Counter(
+    "rate_limited_requests_total",
+    "Requests rejected with 429 by scope (login, register, ...) and the key that hit its limit (ip, email)",
+    ["scope", "key"],
+)
+
+
+class RequestStats:
+    """Mongo commands seen while serving one request: (command, seconds, documents, succeeded)."""
+
+    __slots__ = ("commands",)
+
+    def __init__(self):
+        self.commands: List[Tuple[str, float, int, bool]] = []
+
+
+# Set by MetricsMiddleware for the duration of a request. Motor runs pymongo calls
+# in a copy of the caller's context, so the listener sees the same RequestStats.
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("metrics_current_request", default=None)
+
+
+def _documents_returned(reply) -> int:
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        return len(cursor.get("firstBatch") or cursor.get("nextBatch") or ())
+    # findAndModify returns the document under "value"
+    if "value" in reply:
+        return 1 if reply["value"] is not None else 0
+    return 0
+
+
+def _record_command(route: str, command: str, seconds: float, documents: int, succeeded: bool) -> None:
+    MONGO_COMMANDS.labels(route, command, "ok" if succeeded else "error").inc()
+    MONGO_COMMAND_SECONDS.labels(route, command).observe(seconds)
+    if documents:
+        MONGO_DOCUMENTS_RETURNED.labels(route, command).inc(documents)
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """
+    Counts pymongo commands. Inside a request they are buffered on the request's
+    RequestStats and labelled with its route when the response completes;
+    otherwise they are recorded straight away under ``background``.
+    """
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def _record(self, command: str, micros: int, documents: int, succeeded: bool) -> None:
+        seconds = micros / 1_000_000
+        stats = _current_request.get()
+        if stats is None:
+            _record_command(BACKGROUND, command, seconds, documents, succeeded)
+        else:
+            stats.commands.append((command, seconds, documents, succeeded))
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._record(event.command_name, event.duration_micros, _documents_returned(event.reply), True)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._record(event.command_name, event.duration_micros, 0, False)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing each HTTP request until its last body chunk is sent,
+    so streamed responses (export, SSE) include the time spent streaming.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_request.set(stats)
+        start = time.perf_counter()
+        status = 500
+        finished = False
+
+        async def send_wrapper(message):
+            nonlocal status, finished
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False) and not finished:
+                finished = True
+                self._observe(scope, status, time.perf_counter() - start, stats)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_request.reset(token)
+            if not finished:  # the app raised or the client went away
+                self._observe(scope, status, time.perf_counter() - start, stats)
+
+    @staticmethod
+    def _observe(scope, status: int, seconds: float, stats: RequestStats) -> None:
+        # The router stores the matched route in the scope; its path is the template, e.g. /billing/{billing_id}
+        route = getattr(scope.get("route"), "path", UNMATCHED)
+        method = scope["method"]
+        REQUEST_LATENCY.labels(method, route, str(status)).observe(seconds)
+        REQUEST_MONGO_COMMANDS.labels(method, route).observe(len(stats.commands))
+        REQUEST_MONGO_SECONDS.labels(method, route).observe(sum(c[1] for c in stats.commands))
+        for command, command_seconds, documents, succeeded in stats.commands:
+            _record_command(route, command, command_seconds, documents, succeeded)
+
+
+class CacheCollector:
+    """Exports the hit/miss/eviction counters and size of registered TTLCaches at scrape time."""
+
+    def __init__(self):
+        self._caches: Dict[str, object] = {}
+
+    def register(self, name: str, cache) -> None:
+        self._caches[name] = cache
+
+    def collect(self):
+        hits = CounterMetricFamily("cache_hits", "In-process cache hits", labels=["cache"])
+        misses = CounterMetricFamily("cache_misses", "In-process cache misses", labels=["cache"])
+        evictions = CounterMetricFamily("cache_evictions", "Entries evicted to stay within maxsize", labels=["cache"])
+        size = GaugeMetricFamily("cache_size", "Entries currently held", labels=["cache"])
+        for name, cache in self._caches.items():
+            hits.add_metric([name], cache.hits)
+            misses.add_metric([name], cache.misses)
+            evictions.add_metric([name], cache.evictions)
+            size.add_metric([name], len(cache))
+        yield from (hits, misses, evictions, size)
+
+
+cache_metrics = CacheCollector()
+REGISTRY.register(cache_metrics)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Body and content type for the /metrics endpoint."""
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -1,6 +1,9 @@
+import re
 from pydantic import BaseModel
+from pymongo import IndexModel, ASCENDING, DESCENDING
 from typing import Optional, Literal
 from datetime import datetime
+from app.config import settings
 
 class Billing(BaseModel):
     id: Optional[str] = None
@@ -18,3 +21,59 @@ class Billing(BaseModel):
 
 def get_billing_collection(db):
     return db["billing"]
+
+def get_billing_rollup_collection(db):
+    """Per day x operator x drone x mode_type totals, kept current by billing_service"""
+    return db["billing_daily_rollups"]
+
+def get_billing_deletion_collection(db):
+    """Tombstones for deleted bills, read by the change feed"""
+    return db["billing_deletions"]
+
+# Old bills are moved out of billing into one collection per month, e.g. billing_2025_03
+BILLING_ARCHIVE_PATTERN = re.compile(r"^billing_(\d{4})_(\d{2})$")
+
+def billing_archive_name(created_at: datetime) -> str:
+    return f"billing_{created_at.year}_{created_at.month:02d}"
+
+def get_billing_archive_collection(db, name: str):
+    """One month of archived bills; archived bills are read-only"""
+    return db[name]
+
+# Every list query sorts on (created_at, _id) desc, so each filter key leads
+# a compound index that ends with the sort keys.
+BILLING_INDEXES = [
+    IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_id"),
+    IndexModel([("operator_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="operator_created_at_id"),
+    IndexModel([("farmer_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="farmer_created_at_id"),
+    IndexModel([("drone_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="drone_created_at_id"),
+    # Change feed: changed_at is stamped on every insert and update
+    IndexModel([("changed_at", ASCENDING), ("_id", ASCENDING)], name="changed_at_id"),
+    IndexModel([("operator_id", ASCENDING), ("changed_at", ASCENDING), ("_id", ASCENDING)], name="operator_changed_at_id"),
+]
+
+BILLING_DELETION_INDEXES = [
+    # Tombstones only need to outlive the longest gap between client syncs
+    IndexModel(
+        [("deleted_at", ASCENDING)],
+        name="deleted_at_ttl",
+        expireAfterSeconds=settings.BILLING_TOMBSTONE_RETENTION_DAYS * 86400,
+    ),
+    IndexModel([("operator_id", ASCENDING), ("deleted_at", ASCENDING)], name="operator_deleted_at"),
+]
+
+BILLING_ROLLUP_INDEXES = [
+    IndexModel(
+        [("day", ASCENDING), ("operator_id", ASCENDING), ("drone_id", ASCENDING), ("mode_type", ASCENDING)],
+        name="rollup_key_unique",
+        unique=True,
+    ),
+    IndexModel([("operator_id", ASCENDING), ("day", ASCENDING)], name="operator_day"),
+]
+
+# Archived bills are only listed and exported, so they keep the list indexes
+# and drop the change-feed ones.
+BILLING_ARCHIVE_INDEXES = [
+    index for index in BILLING_INDEXES
+    if index.document["name"] in ("created_at_id", "operator_created_at_id", "farmer_created_at_id", "drone_created_at_id")
+]
@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from pymongo import IndexModel, ASCENDING
 from typing import Optional
 from datetime import datetime
 
@@ -15,3 +16,13 @@ class DroneDetail(BaseModel):
 
 def get_drone_collection(db):
     return db["drone_details"]
+
+DRONE_INDEXES = [
+    # serial_number is optional, so only enforce uniqueness where it is set
+    IndexModel(
+        [("serial_number", ASCENDING)],
+        name="serial_number_unique",
+        unique=True,
+        partialFilterExpression={"serial_number": {"$type": "string"}},
+    ),
+]
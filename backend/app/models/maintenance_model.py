@@ -0,0 +1,3 @@
+def get_maintenance_progress_collection(db):
+    """Checkpoints of long-running maintenance jobs (purge, archive), keyed by job id"""
+    return db["maintenance_progress"]
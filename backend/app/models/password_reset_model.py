@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from pymongo import IndexModel, ASCENDING
 from typing import Optional
 from datetime import datetime
 
@@ -10,3 +11,9 @@ class PasswordResetToken(BaseModel):
 
 def get_password_reset_collection(db):
     return db["password_resets"]
+
+PASSWORD_RESET_INDEXES = [
+    IndexModel([("token", ASCENDING), ("used", ASCENDING)], name="token_used"),
+    # TTL: documents are removed once expires_at has passed
+    IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+]
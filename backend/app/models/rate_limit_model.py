@@ -0,0 +1,10 @@
+from pymongo import IndexModel, ASCENDING
+
+def get_rate_limit_collection(db):
+    """Attempt counters of the shared (mongo) rate limit backend, one document per key and window"""
+    return db["rate_limits"]
+
+RATE_LIMIT_INDEXES = [
+    # TTL: a window's counter is removed once the following window has ended
+    IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+]
@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from pymongo import IndexModel, ASCENDING
 from typing import Optional
 from datetime import datetime
 
@@ -12,3 +13,7 @@ class Role(BaseModel):
 
 def get_role_collection(db):
     return db["roles"]
+
+ROLE_INDEXES = [
+    IndexModel([("name", ASCENDING)], name="name_unique", unique=True),
+]
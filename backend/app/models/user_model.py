@@ -1,4 +1,5 @@
 from pydantic import BaseModel, EmailStr
+from pymongo import IndexModel, ASCENDING
 from typing import Optional
 
 class User(BaseModel):
@@ -11,3 +12,7 @@ class User(BaseModel):
 
 def get_user_collection(db):
     return db["users"]
+
+USER_INDEXES = [
+    IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+]
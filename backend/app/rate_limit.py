@@ -0,0 +1,165 @@
+# Sliding-window rate limits for endpoints that cost a bcrypt round (login, register, password change)
+import logging
+import math
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+from pymongo.errors import PyMongoError
+
+from app.config import settings
+from app.metrics import RATE_LIMITED
+from app.models.rate_limit_model import get_rate_limit_collection
+
+logger = logging.getLogger(__name__)
+
+
+def _estimate(previous: int, current: int, elapsed: float, window: float) -> float:
+    """Sliding-window counter: the previous window's count, weighted by how much of it still overlaps."""
+    return previous * (1 - elapsed / window) + current
+
+
+def _retry_after(previous: int, current: int, elapsed: float, limit: int, window: float) -> float:
+    """Seconds (at least one) until the estimate drops below ``limit`` again."""
+    if current < limit:
+        seconds = window * (1 - (limit - current) / previous) - elapsed
+    else:
+        # Only possible once this window ends and its count becomes the (decaying) previous one
+        seconds = window - elapsed + window * (1 - limit / current)
+    return max(seconds, 1.0)
+
+
+class MemoryRateLimitBackend:
+    """
+    Counters held in this process, so each worker enforces its own limits.
+    At most ``max_keys`` keys are tracked; the least recently used go first.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        # key -> (window index, count in that window, count in the window before)
+        self._windows: "OrderedDict[str, Tuple[int, int, int]]" = OrderedDict()
+
+    def _counts(self, key: str, index: int) -> Tuple[int, int]:
+        """(previous, current) counts for window ``index``."""
+        start, current, previous = self._windows.get(key, (index, 0, 0))
+        if start == index:
+            return previous, current
+        return (current if start == index - 1 else 0), 0
+
+    async def retry_after(self, db, key: str, limit: int, window: float) -> float:
+        """Seconds to wait before ``key`` may try again; 0 if it is under ``limit``."""
+        now = time.time()
+        index = int(now // window)
+        elapsed = now - index * window
+        previous, current = self._counts(key, index)
+        if _estimate(previous, current, elapsed, window) >= limit:
+            return _retry_after(previous, current, elapsed, limit, window)
+        return 0.0
+
+    async def add(self, db, key: str, window: float) -> None:
+        """Count one attempt for ``key``."""
+        index = int(time.time() // window)
+        previous, current = self._counts(key, index)
+        self._windows[key] = (index, current + 1, previous)
+        self._windows.move_to_end(key)
+        while len(self._windows) > self.max_keys:
+            self._windows.popitem(last=False)
+
+
+class MongoRateLimitBackend:
+    """
+    Counters in the rate_limits collection, shared by every worker and API
+    instance. Checking and counting are separate round trips, so concurrent
+    attempts may overshoot the limit by a few.
+    """
+
+    async def retry_after(self, db, key: str, limit: int, window: float) -> float:
+        now = time.time()
+        index = int(now // window)
+        elapsed = now - index * window
+        current_id, previous_id = f"{key}:{index}", f"{key}:{index - 1}"
+
+        counts: Dict[str, int] = {}
+        async for doc in get_rate_limit_collection(db).find({"_id": {"$in": [current_id, previous_id]}}):
+            counts[doc["_id"]] = doc["count"]
+        previous, current = counts.get(previous_id, 0), counts.get(current_id, 0)
+        if _estimate(previous, current, elapsed, window) >= limit:
+            return _retry_after(previous, current, elapsed, limit, window)
+        return 0.0
+
+    async def add(self, db, key: str, window: float) -> None:
+        index = int(time.time() // window)
+        await get_rate_limit_collection(db).update_one(
+            {"_id": f"{key}:{index}"},
+            # Kept until the next window ends, while it still weighs as the previous window
+            {"$inc": {"count": 1}, "$setOnInsert": {"expires_at": datetime.utcfromtimestamp((index + 2) * window)}},
+            upsert=True,
+        )
+
+
+RATE_LIMIT_BACKENDS = {
+    "memory": MemoryRateLimitBackend,
+    "mongo": MongoRateLimitBackend,
+}
+
+
+class AuthRateLimiter:
+    """
+    Limits attempts per client IP and per email within AUTH_RATE_LIMIT_WINDOW_SECONDS
+    (a limit of 0 disables that key). Behind a reverse proxy, run uvicorn with
+    --proxy-headers so the client IP is the caller's, not the proxy's.
+    Rejected attempts are not counted, so a client that backs off for
+    ``Retry-After`` seconds gets through.
+    """
+
+    def __init__(self):
+        self._backend = None
+        self._backend_name: Optional[str] = None
+
+    @property
+    def backend(self):
+        # Resolved on first use, so tests and benchmarks can change the setting after import
+        name = settings.AUTH_RATE_LIMIT_BACKEND
+        if name != self._backend_name:
+            if name != "none" and name not in RATE_LIMIT_BACKENDS:
+                raise ValueError(f"AUTH_RATE_LIMIT_BACKEND must be one of none, {', '.join(RATE_LIMIT_BACKENDS)}")
+            self._backend = RATE_LIMIT_BACKENDS[name]() if name != "none" else None
+            self._backend_name = name
+        return self._backend
+
+    async def check(self, request: Request, db, scope: str, email: Optional[str] = None) -> None:
+        """Count one attempt, or raise 429 with Retry-After when the IP or email is over its limit."""
+        backend = self.backend
+        if backend is None:
+            return
+
+        ip = request.client.host if request.client else "unknown"
+        keys = [("ip", f"{scope}:ip:{ip}", settings.AUTH_RATE_LIMIT_PER_IP)]
+        if email:
+            keys.append(("email", f"{scope}:email:{email.strip().lower()}", settings.AUTH_RATE_LIMIT_PER_EMAIL))
+
+        keys = [(kind, key, limit) for kind, key, limit in keys if limit > 0]
+        window = settings.AUTH_RATE_LIMIT_WINDOW_SECONDS
+        try:
+            # Every key is checked before any is counted, so an attempt rejected
+            # for its email does not use up the IP's budget (or the reverse)
+            for kind, key, limit in keys:
+                retry_after = await backend.retry_after(db, key, limit, window)
+                if retry_after > 0:
+                    RATE_LIMITED.labels(scope, kind).inc()
+                    raise HTTPException(
+                        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                        detail="Too many attempts, try again later",
+                        headers={"Retry-After": str(math.ceil(retry_after))},
+                    )
+            for _, key, _ in keys:
+                await backend.add(db, key, window)
+        except PyMongoError as e:
+            # Fail open: an unavailable counter store should not lock everyone out
+            logger.warning("Rate limit check for %s failed: %s", scope, e)
+
+
+auth_rate_limiter = AuthRateLimiter()
@@ -0,0 +1,112 @@
+# Fast JSON responses: shape raw Mongo documents to a response schema and encode them in one pass
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type, Union, get_args, get_origin
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional, json is the fallback
+    orjson = None
+
+
+def _default(value: Any):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson; content must already match the response schema."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _converter(annotation: Any) -> Optional[Callable[[Any], Any]]:
+    """Coercion pydantic would apply in lax mode for the types our schemas use."""
+    types = get_args(annotation) if get_origin(annotation) is Union else (annotation,)
+    if float in types:
+        return float
+    if int in types:
+        return int
+    return None
+
+
+# (key, default, converter) per field, built once per schema. Keys are the
+# aliases, which are also the Mongo field names (id -> _id).
+_Shape = List[Tuple[str, Any, Optional[Callable[[Any], Any]]]]
+_shapes: Dict[Type[BaseModel], _Shape] = {}
+
+
+def _shape(model: Type[BaseModel]) -> _Shape:
+    shape = _shapes.get(model)
+    if shape is None:
+        shape = []
+        for name, field in model.model_fields.items():
+            key = field.alias or name
+            default = None if field.is_required() else field.get_default(call_default_factory=True)
+            shape.append((key, default, _converter(field.annotation)))
+        _shapes[model] = shape
+    return shape
+
+
+def response_fields(model: Type[BaseModel]) -> List[str]:
+    """Field names of ``model`` as stored in Mongo (aliases, e.g. _id)."""
+    return [key for key, _, _ in _shape(model)]
+
+
+def response_projection(model: Type[BaseModel], fields: Optional[List[str]] = None) -> Dict[str, int]:
+    """Mongo inclusion projection for ``model`` (or a subset of its fields); nothing else is read."""
+    return {key: 1 for key in (fields or response_fields(model))}
+
+
+def shape_document(
+    model: Type[BaseModel],
+    doc: Dict[str, Any],
+    fields: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """Project a raw document onto ``model``'s fields (by alias), without validation."""
+    out = {}
+    for key, default, convert in _shape(model):
+        if fields is not None and key not in fields:
+            continue
+        value = doc.get(key, default)
+        if isinstance(value, ObjectId):
+            value = str(value)
+        elif convert is not None and value is not None and not isinstance(value, bool):
+            value = convert(value)
+        out[key] = value
+    return out
+
+
+def fast_response(
+    model: Type[BaseModel],
+    content: Union[Dict[str, Any], Iterable[Dict[str, Any]]],
+    headers: Optional[Dict[str, str]] = None,
+    envelope: Optional[Dict[str, Any]] = None,
+    fields: Optional[List[str]] = None,
+) -> FastJSONResponse:
+    """
+    Serialize one document, a list, or an envelope whose ``items`` are ``model``
+    documents, producing the same JSON as ``response_model=model`` would.
+    ``fields`` limits the output to a sparse fieldset.
+    """
+    if isinstance(content, dict):
+        body: Any = shape_document(model, content, fields)
+    else:
+        body = [shape_document(model, doc, fields) for doc in content]
+    if envelope is not None:
+        body = {"items": body, **envelope}
+    return FastJSONResponse(body, headers=headers)
@@ -0,0 +1,29 @@
+# Admin-only diagnostics
+from fastapi import APIRouter, Depends
+
+from app.dependencies import admin_required
+from app.schemas.admin import SlowQueryReport
+from app.slow_queries import slow_queries
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+@router.get("/slow-queries", response_model=SlowQueryReport)
+async def slow_query_report(current_user: dict = Depends(admin_required)):
+    """
+    Mongo commands slower than SLOW_QUERY_THRESHOLD_MS, grouped by collection,
+    command and redacted filter shape, slowest total first. ``explain`` shows
+    docs/keys examined versus returned from the latest sampled explain.
+    """
+    return {
+        "threshold_ms": slow_queries.threshold_ms,
+        "dropped": slow_queries.dropped,
+        "shapes": slow_queries.report(),
+    }
+
+
+@router.delete("/slow-queries", response_model=dict)
+async def reset_slow_queries(current_user: dict = Depends(admin_required)):
+    """Clear the recorded shapes."""
+    slow_queries.reset()
+    return {"message": "Slow query log cleared"}
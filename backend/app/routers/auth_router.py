@@ -1,4 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from jose import JWTError
+from pymongo.errors import DuplicateKeyError
 from app.schemas.auth_schema import (
     LoginSchema, 
     ForgotPasswordRequest, 
@@ -13,32 +17,35 @@ from app.services.auth_service import (
     change_password
 )
 from app.models.user_model import get_user_collection
-from app.security.hash import hash_password
+from app.security.hash import hash_password_async
+from app.security.jwt_handler import revoke_token, verify_token
 from app.db import get_db
+from app.rate_limit import auth_rate_limiter
 from app.dependencies import get_current_active_user
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
+optional_bearer = HTTPBearer(auto_error=False)
+
 @router.post("/register", response_model=dict)
-async def register(payload: UserCreate, db=Depends(get_db)):
-    """Register a new user"""
+async def register(payload: UserCreate, request: Request, db=Depends(get_db)):
+    """Register a new user (rate limited per IP and email, see AUTH_RATE_LIMIT_*)"""
+    await auth_rate_limiter.check(request, db, "register", payload.email)
     users_collection = get_user_collection(db)
     
-    # Check if user already exists
-    existing_user = await users_collection.find_one({"email": payload.email})
-    if existing_user:
-        raise HTTPException(status_code=400, detail="Email already registered")
-    
-    # Hash password and create user
+    # Hash password and create user; an existing email is rejected by the unique index
     user_data = {
         "name": payload.name,
         "email": payload.email,
-        "password": hash_password(payload.password),
+        "password": await hash_password_async(payload.password),
         "role_id": payload.role_id,
         "is_active": True
     }
     
-    result = await users_collection.insert_one(user_data)
+    try:
+        result = await users_collection.insert_one(user_data)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already registered")
     
     return {
         "message": "User registered successfully",
@@ -46,8 +53,10 @@ async def register(payload: UserCreate, db=Depends(get_db)):
     }
 
 @router.post("/login")
-async def login(payload: LoginSchema, db=Depends(get_db)):
-    """Login and receive JWT token"""
+async def login(payload: LoginSchema, request: Request, db=Depends(get_db)):
+    """Login and receive JWT token (rate limited per IP and email, see AUTH_RATE_LIMIT_*)"""
+    # Checked before authenticate() spends a bcrypt round on the password
+    await auth_rate_limiter.check(request, db, "login", payload.email)
     return await authenticate(payload.email, payload.password, db)
 
 @router.post("/forgot-password")
@@ -63,16 +72,26 @@ async def reset_password_endpoint(payload: ResetPasswordRequest, db=Depends(get_
 @router.post("/change-password")
 async def change_password_endpoint(
     payload: PasswordChangeRequest,
+    request: Request,
     current_user: dict = Depends(get_current_active_user),
     db=Depends(get_db)
 ):
-    """Change password for authenticated user"""
+    """Change password for authenticated user (rate limited per IP and email, see AUTH_RATE_LIMIT_*)"""
+    await auth_rate_limiter.check(request, db, "change-password", current_user.get("email"))
     user_id = str(current_user["_id"])
     return await change_password(user_id, payload.old_password, payload.new_password, db)
 
 @router.post("/logout")
-def logout():
-    """Logout (client should delete token)"""
+def logout(credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_bearer)):
+    """Logout; the presented token is revoked in this API process (client should still delete it)"""
+    if credentials is not None:
+        # Only valid tokens are recorded, so the revocation list cannot be flooded
+        try:
+            verify_token(credentials.credentials)
+        except JWTError:
+            pass
+        else:
+            revoke_token(credentials.credentials)
     return {"message": "Logged out successfully. Delete token on client side."}
 
 
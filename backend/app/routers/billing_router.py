@@ -1,35 +1,147 @@
 # Billing requests and response manager!
-from datetime import datetime
-from typing import List, Optional
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, List, Literal, Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+import asyncio
 
-from app.db import get_db
-from app.schemas.billing import BillingCreate, BillingUpdate, BillingResponse
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+
+from pydantic import ValidationError
+
+from app.config import settings
+from app.responses import fast_response, response_fields, response_projection
+
+from app.db import get_db, get_analytics_db
+from app.schemas.billing import (
+    BillingCreate,
+    BillingUpdate,
+    BillingResponse,
+    BillingExpandedResponse,
+    BillingBulkResponse,
+    BillingChanges,
+    BillingPage,
+    BillingSummaryResponse,
+)
 
 from app.services.billing_service import (
     create_billing,
+    create_billings_bulk,
     get_billing_by_id,
     get_all_billings,
+    get_billings_page,
     update_billing,
     delete_billing,
+    get_billing_summary,
+    get_billing_changes,
+    encode_changes_watermark,
+    decode_changes_watermark,
+    iter_billings,
+    VersionConflict,
+    ArchivedBilling,
+    OffsetTooLarge,
 )
+from app.services.export_service import stream_csv, stream_ndjson
+from app.services.billing_events import billing_events
+from app.services.reference_cache import reference_cache
+from app.services.expansion_service import BILLING_EXPANSIONS, expand_billings
 
-from app.dependencies import get_current_active_user, admin_required
+from app.dependencies import get_current_active_user, admin_required, sparse_fields
 
 router = APIRouter(prefix="/billing", tags=["Billing"])
 
 
-@router.post("/", response_model=BillingResponse, status_code=status.HTTP_201_CREATED)
-async def create_billing_endpoint(
-    payload: BillingCreate,
-    current_user: dict = Depends(get_current_active_user),
-    db=Depends(get_db),
-):
-    """Create a new billing entry (invoice)."""
-    now = datetime.utcnow()
+def build_billing_filters(
+    current_user: dict,
+    farmer_id: Optional[str] = None,
+    operator_id: Optional[str] = None,
+    drone_id: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> dict:
+    """
+    Build the Mongo filter for billing queries.
+    - Admins see all (can filter by operator).
+    - Operators are always restricted to their own bills.
+    - date_from/date_to bound created_at (both days inclusive), which also
+      limits the archive partitions that are read.
+    """
+    filters = {}
+
+    # If not admin, restrict to own bills
+    if current_user["role_id"] != 1:  # Assuming 1 is Admin
+        filters["operator_id"] = str(current_user["_id"])
+    else:
+        # If admin, apply provided filters
+        if operator_id:
+            filters["operator_id"] = operator_id
+
+    if farmer_id:
+        filters["farmer_id"] = farmer_id
+    if drone_id:
+        filters["drone_id"] = drone_id
+
+    created_at = {}
+    if date_from:
+        created_at["$gte"] = datetime.combine(date_from, time.min)
+    if date_to:
+        created_at["$lt"] = datetime.combine(date_to + timedelta(days=1), time.min)
+    if created_at:
+        filters["created_at"] = created_at
+
+    return filters
+
+
+def billing_expansions(
+    expand: Optional[str] = Query(None, description="Comma-separated: farmer, operator, drone"),
+) -> List[str]:
+    """Parse ?expand=farmer,operator,drone; unknown names are rejected with 400."""
+    if not expand:
+        return []
+    requested = list(dict.fromkeys(name.strip() for name in expand.split(",") if name.strip()))
+    unknown = [name for name in requested if name not in BILLING_EXPANSIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown expand: {', '.join(unknown)}")
+    return requested
 
-    billing_data = {
+
+def expansion_projection(projection: dict, expansions: List[str]) -> dict:
+    """Make sure the id fields behind the requested expansions are read."""
+    return {**projection, **{BILLING_EXPANSIONS[name][0]: 1 for name in expansions}}
+
+
+def billing_etag(doc: dict) -> str:
+    return f'"{doc.get("version") or 0}"'
+
+
+def parse_if_match(if_match: Optional[str]) -> Optional[int]:
+    """Version from an If-Match header (None when absent or `*`)."""
+    if not if_match or if_match.strip() == "*":
+        return None
+    value = if_match.strip()
+    if value.startswith("W/"):
+        value = value[2:]
+    try:
+        return int(value.strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid If-Match header")
+
+
+async def unknown_references(payload: BillingCreate, db) -> List[str]:
+    """Names of farmer_id/drone_id fields that do not exist (checked in memory)."""
+    if not settings.VALIDATE_BILLING_REFERENCES:
+        return []
+    missing = await reference_cache.missing_references(
+        db, farmers=payload.farmer_id, drones=payload.drone_id
+    )
+    return [{"farmers": "farmer_id", "drones": "drone_id"}[kind] for kind in missing]
+
+
+def build_billing_document(payload: BillingCreate, current_user: dict, now: datetime) -> dict:
+    """Billing document for insertion, stamped with audit fields."""
+    # Mongo stores milliseconds; truncate so the echoed document matches what a read returns
+    now = now.replace(microsecond=now.microsecond // 1000 * 1000)
+    return {
         "farmer_id": payload.farmer_id,
         "operator_id": payload.operator_id,
         "drone_id": payload.drone_id,
@@ -43,21 +155,77 @@ async def create_billing_endpoint(
         "updated_by": None,
     }
 
-    inserted_id = await create_billing(billing_data, db)
-    created = await get_billing_by_id(inserted_id, db)
-    if not created:
-        raise HTTPException(status_code=500, detail="Failed to create billing record")
 
-    return created
+@router.post("/", response_model=BillingResponse, status_code=status.HTTP_201_CREATED)
+async def create_billing_endpoint(
+    payload: BillingCreate,
+    current_user: dict = Depends(get_current_active_user),
+    db=Depends(get_db),
+):
+    """Create a new billing entry (invoice)."""
+    unknown = await unknown_references(payload, db)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown {', '.join(unknown)}")
+
+    billing_data = build_billing_document(payload, current_user, datetime.utcnow())
+
+    return await create_billing(billing_data, db)
+
+
+@router.post("/bulk", response_model=BillingBulkResponse)
+async def bulk_create_billing_endpoint(
+    items: List[Dict[str, Any]] = Body(..., max_length=500),
+    current_user: dict = Depends(get_current_active_user),
+    db=Depends(get_db),
+):
+    """
+    Create many billing entries at once (e.g. jobs recorded offline).
+    Each item is validated as BillingCreate; valid items are written with a
+    single unordered insert and the response reports a result per item.
+    """
+    now = datetime.utcnow()
+    results: List[Dict[str, Any]] = [{"index": i} for i in range(len(items))]
+    docs, positions = [], []
+
+    for i, item in enumerate(items):
+        try:
+            payload = BillingCreate.model_validate(item)
+        except ValidationError as e:
+            results[i]["error"] = [
+                {"loc": list(err["loc"]), "msg": err["msg"], "type": err["type"]}
+                for err in e.errors()
+            ]
+            continue
+        unknown = await unknown_references(payload, db)
+        if unknown:
+            results[i]["error"] = [
+                {"loc": [field], "msg": f"Unknown {field}", "type": "reference_not_found"}
+                for field in unknown
+            ]
+            continue
+        docs.append(build_billing_document(payload, current_user, now))
+        positions.append(i)
+
+    for doc_index, outcome in (await create_billings_bulk(docs, db)).items():
+        results[positions[doc_index]].update(outcome)
 
+    inserted = sum(1 for result in results if result.get("id"))
+    return {"inserted": inserted, "failed": len(items) - inserted, "results": results}
 
-@router.get("/", response_model=List[BillingResponse])
+
+@router.get("/", response_model=Union[List[BillingResponse], BillingPage])
 async def list_billings_endpoint(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=200),
+    paginate: Literal["offset", "cursor"] = Query("offset", description="`cursor` returns a page envelope with next_cursor"),
+    after: Optional[str] = Query(None, description="Cursor from a previous page (implies paginate=cursor)"),
     farmer_id: Optional[str] = Query(None),
     operator_id: Optional[str] = Query(None),
     drone_id: Optional[str] = Query(None),
+    date_from: Optional[date] = Query(None, description="Only bills created on or after this day"),
+    date_to: Optional[date] = Query(None, description="Only bills created on or before this day"),
+    fields: Optional[List[str]] = Depends(sparse_fields(BillingResponse)),
+    expand: List[str] = Depends(billing_expansions),
     current_user: dict = Depends(get_current_active_user),
     db=Depends(get_db),
 ):
@@ -65,37 +233,206 @@ async def list_billings_endpoint(
     List billing records.
     - Admins see all (can filter).
     - Operators see only their own.
+    - `date_from`/`date_to` limit the days listed; archived months outside them are not read.
+    - `paginate=cursor` or `after=` switches to keyset pagination; `skip` keeps working otherwise,
+      up to BILLING_MAX_ARCHIVE_SKIP when archived months are in range.
+    - `fields=` returns only the listed columns (plus `_id`).
+    - `expand=farmer,operator,drone` embeds the referenced names, one batched query per collection.
     """
-    filters = {}
-    
-    # If not admin, restrict to own bills
-    if current_user["role_id"] != 1:  # Assuming 1 is Admin
-        filters["operator_id"] = str(current_user["_id"])
-    else:
-        # If admin, apply provided filters
-        if operator_id:
-            filters["operator_id"] = operator_id
+    filters = build_billing_filters(current_user, farmer_id, operator_id, drone_id, date_from, date_to)
+    projection = expansion_projection(response_projection(BillingResponse, fields), expand)
+    if expand:
+        # Only the requested expansions appear in the output
+        fields = (fields or response_fields(BillingResponse)) + expand
+    # Sparse and expanded rows do not match BillingResponse, so they always take the fast path
+    fast = settings.FAST_JSON_RESPONSES or fields is not None or bool(expand)
+    model = BillingExpandedResponse if expand else BillingResponse
 
-    if farmer_id:
-        filters["farmer_id"] = farmer_id
-    if drone_id:
-        filters["drone_id"] = drone_id
+    if paginate == "cursor" or after:
+        try:
+            items, next_cursor = await get_billings_page(
+                db, limit=limit, after=after, filters=filters or None, projection=projection
+            )
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        await expand_billings(db, items, expand)
+        envelope = {"next_cursor": next_cursor, "has_more": next_cursor is not None}
+        if fast:
+            return fast_response(model, items, envelope=envelope, fields=fields)
+        return {"items": items, **envelope}
 
-    billings = await get_all_billings(db, skip=skip, limit=limit, filters=filters or None)
+    try:
+        billings = await get_all_billings(
+            db, skip=skip, limit=limit, filters=filters or None, projection=projection
+        )
+    except OffsetTooLarge:
+        raise HTTPException(
+            status_code=400,
+            detail=f"skip may not exceed {settings.BILLING_MAX_ARCHIVE_SKIP} across archived months; use the after= cursor",
+        )
+    await expand_billings(db, billings, expand)
+    if fast:
+        return fast_response(model, billings, fields=fields)
     return billings
 
 
+@router.get("/summary", response_model=BillingSummaryResponse)
+async def billing_summary_endpoint(
+    group_by: Optional[Literal["month", "operator", "drone", "mode_type"]] = Query(None),
+    farmer_id: Optional[str] = Query(None),
+    operator_id: Optional[str] = Query(None),
+    drone_id: Optional[str] = Query(None),
+    date_from: Optional[date] = Query(None, description="Only bills created on or after this day"),
+    date_to: Optional[date] = Query(None, description="Only bills created on or before this day"),
+    current_user: dict = Depends(get_current_active_user),
+    db=Depends(get_analytics_db),
+):
+    """
+    Count, sum and average of amount, acres and time, computed in MongoDB.
+    Uses the same role scoping and filters as the list endpoint. Reads from a
+    secondary when one is available, so results may lag recent writes slightly.
+    """
+    filters = build_billing_filters(current_user, farmer_id, operator_id, drone_id, date_from, date_to)
+
+    return await get_billing_summary(db, group_by=group_by, filters=filters or None)
+
+
+@router.get("/changes", response_model=BillingChanges)
+async def billing_changes_endpoint(
+    since: Optional[str] = Query(None, description="Watermark from the previous response"),
+    limit: int = Query(500, ge=1, le=1000),
+    farmer_id: Optional[str] = Query(None),
+    operator_id: Optional[str] = Query(None),
+    drone_id: Optional[str] = Query(None),
+    current_user: dict = Depends(get_current_active_user),
+    db=Depends(get_db),
+):
+    """
+    Incremental sync: bills created or updated and bills deleted after `since`.
+    - Without `since`, only a starting watermark is returned; take it before loading the full list.
+    - Uses the same role scoping and filters as the list endpoint.
+    - Changes show up once they are BILLING_CHANGES_SAFETY_SECONDS old.
+    """
+    now = datetime.utcnow()
+    until = now - timedelta(seconds=settings.BILLING_CHANGES_SAFETY_SECONDS)
+    if since is None:
+        return {"watermark": encode_changes_watermark(until)}
+
+    try:
+        position = decode_changes_watermark(since)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid watermark")
+    # Stored timestamps are naive UTC
+    if position[0].tzinfo is not None:
+        position = (position[0].astimezone(timezone.utc).replace(tzinfo=None), position[1])
+
+    retention = timedelta(days=settings.BILLING_TOMBSTONE_RETENTION_DAYS)
+    if position[0] < now - retention:
+        return {"watermark": encode_changes_watermark(until), "reset": True}
+
+    filters = build_billing_filters(current_user, farmer_id, operator_id, drone_id)
+    items, deleted, watermark, has_more = await get_billing_changes(
+        db, position, until, limit=limit, filters=filters or None
+    )
+    return {"items": items, "deleted": deleted, "watermark": watermark, "has_more": has_more}
+
+
+@router.get("/stream")
+async def billing_stream_endpoint(
+    request: Request,
+    farmer_id: Optional[str] = Query(None),
+    operator_id: Optional[str] = Query(None),
+    drone_id: Optional[str] = Query(None),
+    current_user: dict = Depends(get_current_active_user),
+):
+    """
+    Server-Sent Events stream of billing `created`, `updated` and `deleted` events.
+    Uses the same role scoping and filters as the list endpoint. An `overflow`
+    event means the client fell behind and should reload before reconnecting.
+    """
+    filters = build_billing_filters(current_user, farmer_id, operator_id, drone_id)
+    subscription = billing_events.subscribe(filters)
+
+    async def event_source():
+        try:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.queue.get(), timeout=settings.BILLING_STREAM_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {event['data']}\n\n"
+                if event["type"] == "overflow":
+                    break
+        finally:
+            billing_events.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/export")
+async def export_billings_endpoint(
+    format: Literal["csv", "ndjson"] = Query("csv"),
+    farmer_id: Optional[str] = Query(None),
+    operator_id: Optional[str] = Query(None),
+    drone_id: Optional[str] = Query(None),
+    date_from: Optional[date] = Query(None, description="Only bills created on or after this day"),
+    date_to: Optional[date] = Query(None, description="Only bills created on or before this day"),
+    current_user: dict = Depends(get_current_active_user),
+    db=Depends(get_analytics_db),
+):
+    """
+    Stream every matching billing record as CSV or NDJSON.
+    Uses the same role scoping and filters as the list endpoint; rows are read
+    from the cursor in batches, so memory does not grow with the export size.
+    """
+    filters = build_billing_filters(current_user, farmer_id, operator_id, drone_id, date_from, date_to)
+    docs = iter_billings(db, filters=filters or None, batch_size=settings.EXPORT_BATCH_SIZE)
+
+    filename = f"billing-{datetime.utcnow():%Y%m%d-%H%M%S}.{format}"
+    if format == "csv":
+        body, media_type = stream_csv(docs), "text/csv"
+    else:
+        body, media_type = stream_ndjson(docs), "application/x-ndjson"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 @router.get("/{billing_id}", response_model=BillingResponse)
 async def get_billing_endpoint(
     billing_id: str,
+    response: Response,
+    expand: List[str] = Depends(billing_expansions),
     current_user: dict = Depends(get_current_active_user),
     db=Depends(get_db),
 ):
-    """Get a single billing record by its ID."""
-    doc = await get_billing_by_id(billing_id, db)
+    """Get a single billing record by its ID, archived ones included. The ETag carries its version."""
+    doc = await get_billing_by_id(billing_id, db, projection=response_projection(BillingResponse))
     if not doc:
         raise HTTPException(status_code=404, detail="Billing record not found")
 
+    if expand:
+        await expand_billings(db, [doc], expand)
+        return fast_response(
+            BillingExpandedResponse,
+            doc,
+            headers={"ETag": billing_etag(doc)},
+            fields=response_fields(BillingResponse) + expand,
+        )
+    if settings.FAST_JSON_RESPONSES:
+        return fast_response(BillingResponse, doc, headers={"ETag": billing_etag(doc)})
+    response.headers["ETag"] = billing_etag(doc)
     return doc
 
 
@@ -103,13 +440,17 @@ async def get_billing_endpoint(
 async def update_billing_endpoint(
     billing_id: str,
     payload: BillingUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     current_user: dict = Depends(get_current_active_user),
     db=Depends(get_db),
 ):
-    """Update a billing record."""
-    existing = await get_billing_by_id(billing_id, db)
-    if not existing:
-        raise HTTPException(status_code=404, detail="Billing record not found")
+    """
+    Update a billing record.
+    Send `If-Match: "<version>"` to reject the update if someone else changed it first (412).
+    Archived bills are read-only (409).
+    """
+    expected_version = parse_if_match(if_match)
 
     update_data = payload.dict(exclude_unset=True)
     if not update_data:
@@ -118,26 +459,39 @@ async def update_billing_endpoint(
     update_data["updated_at"] = datetime.utcnow()
     update_data["updated_by"] = str(current_user["_id"])
 
-    success = await update_billing(billing_id, update_data, db)
-    if not success:
-        raise HTTPException(status_code=400, detail="Update failed")
+    try:
+        updated = await update_billing(billing_id, update_data, db, expected_version=expected_version)
+    except VersionConflict:
+        raise HTTPException(status_code=412, detail="Billing record was modified by someone else")
+    except ArchivedBilling:
+        raise HTTPException(status_code=409, detail="Billing record is archived and read-only")
+    if not updated:
+        raise HTTPException(status_code=404, detail="Billing record not found")
 
-    return {"message": "Billing record updated successfully"}
+    response.headers["ETag"] = billing_etag(updated)
+    return {"message": "Billing record updated successfully", "version": updated["version"]}
 
 
 @router.delete("/{billing_id}", response_model=dict)
 async def delete_billing_endpoint(
     billing_id: str,
+    if_match: Optional[str] = Header(None),
     current_user: dict = Depends(admin_required),
     db=Depends(get_db),
 ):
-    """Delete a billing record (admin only)."""
-    existing = await get_billing_by_id(billing_id, db)
-    if not existing:
-        raise HTTPException(status_code=404, detail="Billing record not found")
-
-    success = await delete_billing(billing_id, db)
+    """Delete a billing record (admin only). Honours If-Match like update; archived bills give 409."""
+    try:
+        success = await delete_billing(
+            billing_id,
+            db,
+            deleted_by=str(current_user["_id"]),
+            expected_version=parse_if_match(if_match),
+        )
+    except VersionConflict:
+        raise HTTPException(status_code=412, detail="Billing record was modified by someone else")
+    except ArchivedBilling:
+        raise HTTPException(status_code=409, detail="Billing record is archived and read-only")
     if not success:
-        raise HTTPException(status_code=400, detail="Delete failed")
+        raise HTTPException(status_code=404, detail="Billing record not found")
 
     return {"message": "Billing record deleted successfully"}
@@ -0,0 +1,47 @@
+# Reference data (drones, farmers, roles) served from the in-memory cache
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.db import get_db
+from app.dependencies import get_current_active_user
+from app.responses import fast_response
+from app.schemas.reference import DroneRate, DroneReference, FarmerReference, RoleReference
+from app.services.reference_cache import reference_cache
+
+router = APIRouter(prefix="/reference", tags=["Reference"])
+
+
+async def _serve(kind: str, model, db, response_headers: dict):
+    await reference_cache.ensure_loaded(db)
+    return fast_response(model, reference_cache.all(kind), headers=response_headers)
+
+
+def _version_headers() -> dict:
+    return {"X-Reference-Version": str(reference_cache.version)}
+
+
+@router.get("/drones", response_model=List[DroneReference])
+async def list_drones(current_user: dict = Depends(get_current_active_user), db=Depends(get_db)):
+    """Drones with their per_hour_rate (no database round trip)."""
+    return await _serve("drones", DroneReference, db, _version_headers())
+
+
+@router.get("/drones/{drone_id}/rate", response_model=DroneRate)
+async def get_drone_rate(drone_id: str, current_user: dict = Depends(get_current_active_user), db=Depends(get_db)):
+    """per_hour_rate of one drone (no database round trip unless the drone is new)."""
+    if await reference_cache.missing_references(db, drones=drone_id):
+        raise HTTPException(status_code=404, detail="Drone not found")
+    return {"drone_id": drone_id, "per_hour_rate": reference_cache.drone_rate(drone_id)}
+
+
+@router.get("/farmers", response_model=List[FarmerReference])
+async def list_farmers(current_user: dict = Depends(get_current_active_user), db=Depends(get_db)):
+    """Farmers (no database round trip)."""
+    return await _serve("farmers", FarmerReference, db, _version_headers())
+
+
+@router.get("/roles", response_model=List[RoleReference])
+async def list_roles(current_user: dict = Depends(get_current_active_user), db=Depends(get_db)):
+    """Roles (no database round trip)."""
+    return await _serve("roles", RoleReference, db, _version_headers())
@@ -1,15 +1,20 @@
+from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
+from pymongo.errors import DuplicateKeyError
 from app.db import get_db
 from app.schemas.users import UserCreate, UserUpdate, UserUpdateSelf, UserResponse
 from app.services.user_service import (
     create_user, get_user_by_id, get_all_users,
-    update_user, delete_user, get_user_by_email
+    update_user, delete_user
 )
 from app.dependencies import (
     get_current_active_user,
-    admin_required
+    admin_required,
+    sparse_fields
 )
 from app.security.hash import hash_password
+from app.config import settings
+from app.responses import fast_response, response_projection
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -17,6 +22,8 @@ router = APIRouter(prefix="/users", tags=["Users"])
 @router.get("/me", response_model=UserResponse)
 async def get_my_profile(current_user: dict = Depends(get_current_active_user)):
     """Get current user's profile"""
+    if settings.FAST_JSON_RESPONSES:
+        return fast_response(UserResponse, current_user)
     return current_user
 
 @router.put("/me", response_model=dict)
@@ -28,14 +35,12 @@ async def update_my_profile(
     """Update current user's profile (limited fields)"""
     user_id = str(current_user["_id"])
     
-    # Check if email is being changed and if it's already taken
-    if payload.email and payload.email != current_user.get("email"):
-        existing_user = await get_user_by_email(payload.email, db)
-        if existing_user:
-            raise HTTPException(status_code=400, detail="Email already in use")
-    
+    # A taken email is rejected by the unique email index
     update_data = payload.dict(exclude_unset=True)
-    success = await update_user(user_id, update_data, db)
+    try:
+        success = await update_user(user_id, update_data, db)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already in use")
     
     if not success:
         raise HTTPException(status_code=400, detail="Update failed")
@@ -47,11 +52,17 @@ async def update_my_profile(
 async def list_users(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    fields: Optional[List[str]] = Depends(sparse_fields(UserResponse)),
     current_user: dict = Depends(admin_required),
     db=Depends(get_db)
 ):
-    """Get all users (admin only) with pagination"""
-    users = await get_all_users(db, skip=skip, limit=limit)
+    """Get all users (admin only) with pagination; `fields=` limits the columns returned"""
+    users = await get_all_users(
+        db, skip=skip, limit=limit, projection=response_projection(UserResponse, fields)
+    )
+    # Sparse rows do not satisfy UserResponse, so they always take the fast path
+    if settings.FAST_JSON_RESPONSES or fields is not None:
+        return fast_response(UserResponse, users, fields=fields)
     return users
 
 @router.get("/{user_id}", response_model=UserResponse)
@@ -68,10 +79,12 @@ async def get_user(
     if not (is_admin or is_self):
         raise HTTPException(status_code=403, detail="Access denied")
     
-    user = await get_user_by_id(user_id, db)
+    user = await get_user_by_id(user_id, db, projection=response_projection(UserResponse))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
+    if settings.FAST_JSON_RESPONSES:
+        return fast_response(UserResponse, user)
     return user
 
 @router.put("/{user_id}", response_model=dict)
@@ -97,14 +110,12 @@ async def update_user_endpoint(
                 detail="You can only update your name and email"
             )
     
-    # Check if email is being changed and if it's already taken
-    if payload.email:
-        existing_user = await get_user_by_email(payload.email, db)
-        if existing_user and str(existing_user["_id"]) != user_id:
-            raise HTTPException(status_code=400, detail="Email already in use")
-    
+    # A taken email is rejected by the unique email index
     update_data = payload.dict(exclude_unset=True)
-    success = await update_user(user_id, update_data, db)
+    try:
+        success = await update_user(user_id, update_data, db)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already in use")
     
     if not success:
         raise HTTPException(status_code=404, detail="User not found or update failed")
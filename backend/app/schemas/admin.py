@@ -0,0 +1,28 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+class SlowQueryExplain(BaseModel):
+    docs_examined: Optional[int] = None
+    keys_examined: Optional[int] = None
+    returned: Optional[int] = None
+    execution_ms: Optional[int] = None
+    stages: List[str] = []
+    explained_at: datetime
+
+class SlowQueryShape(BaseModel):
+    collection: Optional[str] = None
+    command: str
+    shape: Dict[str, Any]
+    count: int
+    total_ms: float
+    avg_ms: float
+    max_ms: float
+    docs_returned: int
+    last_seen: datetime
+    explain: Optional[SlowQueryExplain] = None
+
+class SlowQueryReport(BaseModel):
+    threshold_ms: float
+    dropped: int
+    shapes: List[SlowQueryShape]
@@ -1,7 +1,7 @@
 
 from app.schemas.common import PyObjectId
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional, Literal
+from typing import Optional, Literal, List, Any
 from datetime import datetime
 
 class BillingCreate(BaseModel):
@@ -19,6 +19,13 @@ class BillingUpdate(BaseModel):
     amount: Optional[float] = Field(None, gt=0)
     mode_type: Optional[Literal["cash", "upi"]] = None
 
+class ExpandedReference(BaseModel):
+    """Name of a referenced farmer, operator or drone, embedded by ?expand="""
+    id: Optional[str] = Field(alias="_id", default=None)
+    name: Optional[str] = None
+
+    model_config = ConfigDict(populate_by_name=True)
+
 class BillingResponse(BaseModel):
     id: Optional[PyObjectId] = Field(alias="_id", default=None)
     farmer_id: str
@@ -32,5 +39,58 @@ class BillingResponse(BaseModel):
     updated_at: Optional[datetime] = None
     created_by: Optional[str] = None
     updated_by: Optional[str] = None
+    version: int = Field(0, description="Incremented on every update; send it back in If-Match")
 
     model_config = ConfigDict(populate_by_name=True, from_attributes=True)
+
+class BillingExpandedResponse(BillingResponse):
+    """BillingResponse with the references requested via ?expand= embedded"""
+    farmer: Optional[ExpandedReference] = None
+    operator: Optional[ExpandedReference] = None
+    drone: Optional[ExpandedReference] = None
+
+class BillingBulkItemResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    error: Optional[Any] = None
+
+class BillingBulkResponse(BaseModel):
+    inserted: int
+    failed: int
+    results: List[BillingBulkItemResult]
+
+class BillingPage(BaseModel):
+    """Cursor-paginated billing list envelope"""
+    items: List[BillingResponse]
+    next_cursor: Optional[str] = Field(None, description="Pass as `after` to fetch the next page")
+    has_more: bool = False
+
+class BillingTombstone(BaseModel):
+    id: str
+    deleted_at: datetime
+
+class BillingChanges(BaseModel):
+    """Change feed page: apply `items` as upserts and `deleted` as removals, then resume from `watermark`"""
+    items: List[BillingResponse] = []
+    deleted: List[BillingTombstone] = []
+    watermark: str = Field(..., description="Opaque position; pass it as `since` on the next call")
+    has_more: bool = False
+    reset: bool = Field(False, description="`since` is older than tombstone retention; reload the full list")
+
+class SummaryFieldStats(BaseModel):
+    sum: float = 0
+    avg: float = 0
+
+class BillingSummaryStats(BaseModel):
+    count: int = 0
+    amount: SummaryFieldStats
+    acres: SummaryFieldStats
+    time: SummaryFieldStats
+
+class BillingSummaryGroup(BillingSummaryStats):
+    key: Optional[str] = Field(None, description="Month (YYYY-MM), operator id, drone id or mode type")
+
+class BillingSummaryResponse(BaseModel):
+    group_by: Optional[Literal["month", "operator", "drone", "mode_type"]] = None
+    totals: BillingSummaryStats
+    groups: List[BillingSummaryGroup] = []
@@ -0,0 +1,30 @@
+
+from app.schemas.common import PyObjectId
+from pydantic import BaseModel, Field, ConfigDict
+from typing import Optional
+
+class DroneReference(BaseModel):
+    id: Optional[PyObjectId] = Field(alias="_id", default=None)
+    name: str
+    model: Optional[str] = None
+    serial_number: Optional[str] = None
+    per_hour_rate: float
+
+    model_config = ConfigDict(populate_by_name=True, from_attributes=True)
+
+class DroneRate(BaseModel):
+    drone_id: str
+    per_hour_rate: float
+
+class FarmerReference(BaseModel):
+    id: Optional[PyObjectId] = Field(alias="_id", default=None)
+    name: str
+    number: Optional[str] = None
+
+    model_config = ConfigDict(populate_by_name=True, from_attributes=True)
+
+class RoleReference(BaseModel):
+    id: Optional[PyObjectId] = Field(alias="_id", default=None)
+    name: str
+
+    model_config = ConfigDict(populate_by_name=True, from_attributes=True)
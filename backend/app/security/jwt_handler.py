@@ -1,8 +1,21 @@
+import hashlib
+import time
 from datetime import datetime, timedelta
+from typing import Dict
 from jose import jwt, JWTError
+from app.cache import TTLCache
 from app.config import settings
+from app.metrics import cache_metrics
 import secrets
 
+# Claims of tokens whose signature and exp were already checked, keyed by the token's SHA-256,
+# so clients re-sending the same token skip the decode. Entries expire with the token.
+claims_cache = TTLCache(maxsize=settings.JWT_CLAIMS_CACHE_MAX_SIZE, ttl=settings.JWT_CLAIMS_CACHE_TTL_SECONDS)
+cache_metrics.register("jwt_claims", claims_cache)
+
+# Token hash -> exp (epoch seconds) of tokens revoked in this process
+_revoked: Dict[bytes, float] = {}
+
 def create_access_token(data: dict):
     payload = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=settings.JWT_EXPIRE_MINUTES)
@@ -20,14 +33,49 @@ def create_reset_token(email: str):
     }
     return token, expire
 
+def _token_key(token: str) -> bytes:
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
 def verify_token(token: str):
+    """
+    Return the claims of a valid token, raising JWTError otherwise.
+    Verified claims are served from claims_cache until the token expires.
+    """
+    key = _token_key(token)
+    if key in _revoked:
+        raise JWTError("Token has been revoked")
+
+    claims = claims_cache.get(key)
+    if claims is None:
+        claims = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+        exp = claims.get("exp")
+        claims_cache.set(key, claims, ttl=None if exp is None else exp - time.time())
+    # Callers get their own copy so they cannot mutate the cached entry
+    return dict(claims)
+
+def revoke_token(token: str) -> None:
+    """
+    Reject ``token`` from now on and drop its cached claims. Revocation is per
+    process and lasts until the token's exp; a token without exp stays revoked
+    until restart.
+    """
+    now = time.time()
+    for key, exp in list(_revoked.items()):
+        if exp <= now:
+            del _revoked[key]
+
     try:
-        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
-        return payload
-    except JWTError as e:
-        raise JWTError(f"Token verification failed: {str(e)}")
+        exp = jwt.get_unverified_claims(token).get("exp")
+    except JWTError:
+        exp = None
+    key = _token_key(token)
+    _revoked[key] = exp if isinstance(exp, (int, float)) else float("inf")
+    claims_cache.invalidate(key)
+
+def clear_token_cache() -> None:
+    """Forget all cached claims, e.g. after rotating JWT_SECRET_KEY."""
+    claims_cache.clear()
 
 def verify_reset_token(token: str, stored_token: str):
     """Verify that the reset token matches and is not expired"""
     return token == stored_token
-
@@ -1,10 +1,30 @@
+import logging
 from fastapi import HTTPException
+from pymongo.errors import PyMongoError
 from app.models.user_model import get_user_collection
 from app.models.password_reset_model import get_password_reset_collection
-from app.security.hash import verify_password, hash_password
+from app.security.hash import verify_password_async, hash_password_async, needs_rehash
 from app.security.jwt_handler import create_access_token, create_reset_token, verify_reset_token
+from app.services.user_service import invalidate_cached_user
 from datetime import datetime, timezone
 
+logger = logging.getLogger(__name__)
+
+async def rehash_password(user: dict, password: str, db):
+    """
+    Re-hash a verified password at the configured BCRYPT_ROUNDS. The update only
+    applies if the stored hash is unchanged, so a concurrent password change wins.
+    """
+    new_hash = await hash_password_async(password)
+    try:
+        await get_user_collection(db).update_one(
+            {"_id": user["_id"], "password": user["password"]},
+            {"$set": {"password": new_hash}},
+        )
+    except PyMongoError as e:
+        # The login already succeeded; the next one retries
+        logger.warning("Could not rehash password of user %s: %s", user["_id"], e)
+
 async def authenticate(email: str, password: str, db):
     users_collection = get_user_collection(db)
     user = await users_collection.find_one({"email": email})
@@ -12,14 +32,17 @@ async def authenticate(email: str, password: str, db):
     if not user:
         raise HTTPException(status_code=400, detail="Invalid email or password")
     
-    if not verify_password(password, user.get("password", "")):
+    if not await verify_password_async(password, user.get("password", "")):
         raise HTTPException(status_code=400, detail="Invalid email or password")
 
+    # Moves users to a new BCRYPT_ROUNDS as they log in, without a migration
+    if needs_rehash(user["password"]):
+        await rehash_password(user, password, db)
+
     token = create_access_token({
         "sub": str(user["_id"]), 
         "email": user["email"]
     })
-    print(user)
     role= "admin" if user.get("role_id") ==1 else "operator"
     return {
         "access_token": token, 
@@ -80,12 +103,15 @@ async def reset_password(token: str, new_password: str, db):
     
     # Update user password
     users_collection = get_user_collection(db)
-    hashed_password = hash_password(new_password)
+    hashed_password = await hash_password_async(new_password)
     
-    await users_collection.update_one(
+    updated_user = await users_collection.find_one_and_update(
         {"email": reset_record["email"]},
-        {"$set": {"password": hashed_password}}
+        {"$set": {"password": hashed_password}},
+        projection={"_id": 1}
     )
+    if updated_user:
+        invalidate_cached_user(updated_user["_id"])
     
     # Mark token as used
     await reset_collection.update_one(
@@ -106,14 +132,15 @@ async def change_password(user_id: str, old_password: str, new_password: str, db
         raise HTTPException(status_code=404, detail="User not found")
     
     # Verify old password
-    if not verify_password(old_password, user.get("password", "")):
+    if not await verify_password_async(old_password, user.get("password", "")):
         raise HTTPException(status_code=400, detail="Incorrect old password")
     
     # Update to new password
-    hashed_password = hash_password(new_password)
+    hashed_password = await hash_password_async(new_password)
     await users_collection.update_one(
         {"_id": ObjectId(user_id)},
         {"$set": {"password": hashed_password}}
     )
+    invalidate_cached_user(user_id)
     
     return {"message": "Password changed successfully"}
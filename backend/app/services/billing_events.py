@@ -0,0 +1,138 @@
+# In-process pub/sub for live billing events (create / update / delete)
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
+
+from bson import ObjectId
+from pymongo.errors import PyMongoError
+
+from app.config import settings
+from app.models.billing_model import get_billing_collection, get_billing_deletion_collection
+
+logger = logging.getLogger(__name__)
+
+# Fields a subscription may filter on; every event carries them
+SCOPE_FIELDS = ("operator_id", "farmer_id", "drone_id")
+
+
+def _json_default(value: Any):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class Subscription:
+    """One listener: a bounded queue plus the filters it was opened with."""
+
+    def __init__(self, filters: Dict[str, Any], queue_size: int):
+        self.filters = filters
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def matches(self, event: Dict[str, Any]) -> bool:
+        return all(event.get(field) == value for field, value in self.filters.items())
+
+
+class BillingEventBus:
+    """
+    Fans events out to every matching subscriber without touching the database.
+    Events are serialized once on publish and shared by all subscribers. A
+    subscriber whose queue fills up is dropped instead of slowing publishers.
+    Subscribers are bucketed by operator_id, so an event only visits the
+    subscribers of its operator plus the unscoped (admin) ones.
+    """
+
+    def __init__(self, queue_size: int = 256):
+        self.queue_size = queue_size
+        self._by_operator: Dict[Optional[str], Set[Subscription]] = {}
+        # False while a change stream feeds the bus, so writes are not published twice
+        self.local_publish = True
+
+    def __len__(self) -> int:
+        return sum(len(bucket) for bucket in self._by_operator.values())
+
+    def subscribe(self, filters: Optional[Dict[str, Any]] = None) -> Subscription:
+        subscription = Subscription(filters or {}, self.queue_size)
+        bucket = subscription.filters.get("operator_id")
+        self._by_operator.setdefault(bucket, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        key = subscription.filters.get("operator_id")
+        bucket = self._by_operator.get(key)
+        if bucket is not None:
+            bucket.discard(subscription)
+            if not bucket:
+                del self._by_operator[key]
+
+    def publish(self, event_type: str, doc: Dict[str, Any]) -> None:
+        """Publish a bill (or tombstone-like dict with _id) as an event."""
+        event = {field: doc.get(field) for field in SCOPE_FIELDS}
+        event["type"] = event_type
+        event["id"] = str(doc["_id"])
+        if event_type == "deleted":
+            event["data"] = json.dumps({"_id": event["id"]})
+        else:
+            event["data"] = json.dumps(doc, default=_json_default)
+
+        candidates = list(self._by_operator.get(None, ()))
+        if event["operator_id"] is not None:
+            candidates.extend(self._by_operator.get(event["operator_id"], ()))
+
+        for subscription in candidates:
+            if not subscription.matches(event):
+                continue
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Slow consumer: drop its backlog and tell it to resync
+                subscription.overflowed = True
+                self.unsubscribe(subscription)
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.queue.put_nowait({"type": "overflow", "data": "{}"})
+
+    def publish_local(self, event_type: str, doc: Dict[str, Any]) -> None:
+        """Called by billing_service after a write; no-op when a change stream is the source."""
+        if self.local_publish:
+            self.publish(event_type, doc)
+
+
+billing_events = BillingEventBus(queue_size=settings.BILLING_STREAM_QUEUE_SIZE)
+
+
+async def _watch_billing(db, bus: BillingEventBus) -> None:
+    pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}}]
+    async with get_billing_collection(db).watch(pipeline, full_document="updateLookup") as stream:
+        async for change in stream:
+            doc = change.get("fullDocument")
+            if doc:
+                bus.publish("created" if change["operationType"] == "insert" else "updated", doc)
+
+
+async def _watch_deletions(db, bus: BillingEventBus) -> None:
+    # Tombstones carry the scoping fields that a raw delete event lacks
+    pipeline = [{"$match": {"operationType": "insert"}}]
+    async with get_billing_deletion_collection(db).watch(pipeline) as stream:
+        async for change in stream:
+            tombstone = change["fullDocument"]
+            bus.publish("deleted", {**tombstone, "_id": tombstone["billing_id"]})
+
+
+async def run_change_stream_publisher(db, bus: BillingEventBus = billing_events) -> None:
+    """
+    Feed the bus from MongoDB change streams (requires a replica set), so writes
+    made by other workers reach this worker's subscribers too. Falls back to
+    local publishing if change streams are unavailable.
+    """
+    bus.local_publish = False
+    try:
+        await asyncio.gather(_watch_billing(db, bus), _watch_deletions(db, bus))
+    except PyMongoError as e:
+        logger.error("Billing change streams unavailable, publishing locally: %s", e)
+    finally:
+        bus.local_publish = True
@@ -1,40 +1,478 @@
 # Actuall worker (this connects with database)!
-from typing import Optional, Dict, Any
+import base64
+import heapq
+import json
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
 from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
 
-from app.models.billing_model import get_billing_collection
+from app.models.billing_model import get_billing_collection, get_billing_deletion_collection
+from app.config import settings
+from app.services.billing_events import billing_events
+from app.services.partition_service import (
+    BillingPartition,
+    billing_partitions,
+    created_at_range,
+    find_archived_billing,
+    union_archives,
+)
+from app.services.rollup_service import apply_rollup_deltas, summarize_rollups, ROLLUP_FILTER_FIELDS
+
+# Group keys accepted by get_billing_summary, mapped to the expression grouped on
+SUMMARY_GROUP_KEYS: Dict[str, Any] = {
+    "month": {"$dateToString": {"format": "%Y-%m", "date": "$created_at"}},
+    "operator": "$operator_id",
+    "drone": "$drone_id",
+    "mode_type": "$mode_type",
+}
+
+SUMMARY_FIELDS = ("amount", "acres", "time")
 
 def billing_collection(db):
     return get_billing_collection(db) 
 
+def _summary_accumulators() -> Dict[str, Any]:
+    """$group accumulators for count plus sum/avg of each summary field."""
+    accumulators: Dict[str, Any] = {"count": {"$sum": 1}}
+    for field in SUMMARY_FIELDS:
+        accumulators[f"{field}_sum"] = {"$sum": f"${field}"}
+        accumulators[f"{field}_avg"] = {"$avg": f"${field}"}
+    return accumulators
+
+def _summary_stats(row: Dict[str, Any]) -> Dict[str, Any]:
+    stats: Dict[str, Any] = {"count": row.get("count", 0)}
+    for field in SUMMARY_FIELDS:
+        stats[field] = {
+            "sum": row.get(f"{field}_sum") or 0,
+            "avg": row.get(f"{field}_avg") or 0,
+        }
+    return stats
+
+class VersionConflict(Exception):
+    """The bill exists but its version no longer matches the caller's If-Match."""
+
+class ArchivedBilling(Exception):
+    """The bill was moved to a monthly archive collection, where it is read-only."""
+
+class OffsetTooLarge(Exception):
+    """An offset page reaching archives asked to skip more than BILLING_MAX_ARCHIVE_SKIP bills."""
+
+def _stamp_changed(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Set changed_at (change feed watermark) and the initial version on an inserted document."""
+    doc.setdefault("changed_at", doc.get("created_at") or datetime.utcnow())
+    doc.setdefault("version", 1)
+    return doc
+
+def _version_filter(version: int) -> Dict[str, Any]:
+    # Bills written before versioning have no version field and count as version 0
+    return {"version": {"$in": [0, None]}} if version == 0 else {"version": version}
+
 async def create_billing(data: Dict[str, Any], db):
-    """Insert a billing document and return inserted id as string."""
+    """Insert a billing document and return it, including its new _id."""
     coll = billing_collection(db)
-    result = await coll.insert_one(data)
-    return str(result.inserted_id)
+    _stamp_changed(data)
+    await coll.insert_one(data)
+    await apply_rollup_deltas(db, [(data, 1)])
+    billing_events.publish_local("created", data)
+    return data
 
-async def get_billing_by_id(billing_id: str, db):
+async def create_billings_bulk(docs: List[Dict[str, Any]], db) -> Dict[int, Dict[str, Any]]:
+    """
+    Insert many billing documents with one unordered insert_many.
+    Returns {position in docs: {"id": ...} or {"error": ...}}.
+    """
+    if not docs:
+        return {}
     coll = billing_collection(db)
-    doc = await coll.find_one({"_id": ObjectId(billing_id)})
-    return doc
+    errors: Dict[int, str] = {}
+    for doc in docs:
+        _stamp_changed(doc)
+    try:
+        await coll.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        # Unordered: everything except the reported writeErrors was inserted
+        for write_error in e.details.get("writeErrors", []):
+            errors[write_error["index"]] = write_error.get("errmsg", "Insert failed")
 
-async def get_all_billings(db, skip: int = 0, limit: int = 100, filters: Optional[Dict[str, Any]] = None):
+    inserted = [doc for i, doc in enumerate(docs) if i not in errors]
+    await apply_rollup_deltas(db, [(doc, 1) for doc in inserted])
+    for doc in inserted:
+        billing_events.publish_local("created", doc)
+
+    # insert_many assigns _id on each document before sending it
+    return {
+        i: {"error": errors[i]} if i in errors else {"id": str(doc["_id"])}
+        for i, doc in enumerate(docs)
+    }
+
+async def get_billing_by_id(billing_id: str, db, projection: Optional[Dict[str, Any]] = None):
+    """A bill from the hot collection, or from the archives when it has been tiered out."""
     coll = billing_collection(db)
-    query: Dict[str, Any] = filters or {}
-    cursor = coll.find(query).skip(skip).limit(limit).sort("created_at", -1)
-    billings = await cursor.to_list(length=limit)
-    return billings
+    doc = await coll.find_one({"_id": ObjectId(billing_id)}, projection=projection)
+    if doc is None:
+        doc = await find_archived_billing(db, ObjectId(billing_id), projection=projection)
+    return doc
+
+# Newest first; _id breaks ties between bills created in the same millisecond
+BILLING_SORT = [("created_at", -1), ("_id", -1)]
+
+def _sort_key(doc: Dict[str, Any]):
+    """BILLING_SORT as a Python key (descending); bills without created_at sort last, as in Mongo."""
+    created_at = doc.get("created_at")
+    return (created_at is not None, created_at or datetime.min, doc["_id"])
+
+async def _find_across_partitions(
+    partitions: List[BillingPartition],
+    query: Dict[str, Any],
+    limit: int,
+    projection: Optional[Dict[str, Any]] = None,
+    after: Optional[Tuple[Optional[datetime], ObjectId]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    The first ``limit`` bills in BILLING_SORT order from the hot collection and
+    the given archive ``partitions``. Archives are visited newest first; the walk
+    stops as soon as an archive can only hold bills older than the ``limit``
+    already found. ``after`` is a page cursor position.
+    """
+    if projection is not None:
+        # Merging needs created_at, whatever the caller asked for
+        projection = {**projection, "created_at": 1}
+    found: List[Dict[str, Any]] = []
+    for partition in partitions:
+        if partition.start is not None:
+            if after is not None and (after[0] is None or partition.start > after[0]):
+                continue  # every archived bill comes before the cursor
+            oldest = found[limit - 1].get("created_at") if len(found) >= limit else None
+            if oldest is not None and partition.end <= oldest:
+                break
+        docs = await (
+            partition.collection.find(query, projection=projection).sort(BILLING_SORT).limit(limit).to_list(length=limit)
+        )
+        found = list(heapq.merge(found, docs, key=_sort_key, reverse=True))[:limit] if found else docs
+    return found
+
+async def get_all_billings(
+    db,
+    skip: int = 0,
+    limit: int = 100,
+    filters: Optional[Dict[str, Any]] = None,
+    projection: Optional[Dict[str, Any]] = None,
+):
+    """
+    One offset page across the hot collection and the archives the filters reach.
+    With no archive in range Mongo applies ``skip``; otherwise the first
+    ``skip + limit`` bills are merged here, so ``skip`` may not exceed
+    BILLING_MAX_ARCHIVE_SKIP (OffsetTooLarge).
+    """
+    query = filters or {}
+    partitions = await billing_partitions(db, *created_at_range(query))
+    if len(partitions) == 1:
+        return await (
+            partitions[0].collection.find(query, projection=projection)
+            .sort(BILLING_SORT).skip(skip).limit(limit).to_list(length=limit)
+        )
+
+    if skip > settings.BILLING_MAX_ARCHIVE_SKIP:
+        raise OffsetTooLarge(skip)
+    billings = await _find_across_partitions(partitions, query, skip + limit, projection=projection)
+    return billings[skip:]
+
+class _Newest:
+    """Heap entry that pops the newest bill first."""
+
+    __slots__ = ("key", "source")
+
+    def __init__(self, doc: Dict[str, Any], source: int):
+        self.key = _sort_key(doc)
+        self.source = source
+
+    def __lt__(self, other: "_Newest") -> bool:
+        return self.key > other.key
+
+async def iter_billings(db, filters: Optional[Dict[str, Any]] = None, batch_size: int = 1000):
+    """
+    Yield every matching bill in BILLING_SORT order without buffering the result set,
+    merging the hot collection with the archives the filters reach.
+    """
+    query = filters or {}
+    cursors = [
+        partition.collection.find(query).sort(BILLING_SORT).batch_size(batch_size)
+        for partition in await billing_partitions(db, *created_at_range(query))
+    ]
+    if len(cursors) == 1:
+        async for doc in cursors[0]:
+            yield doc
+        return
+
+    heap = []
+    for source, cursor in enumerate(cursors):
+        doc = await _next_or_none(cursor)
+        if doc is not None:
+            heap.append((_Newest(doc, source), doc))
+    heapq.heapify(heap)
+    while heap:
+        entry, doc = heap[0]
+        yield doc
+        following = await _next_or_none(cursors[entry.source])
+        if following is None:
+            heapq.heappop(heap)
+        else:
+            heapq.heapreplace(heap, (_Newest(following, entry.source), following))
+
+async def _next_or_none(cursor) -> Optional[Dict[str, Any]]:
+    try:
+        return await cursor.__anext__()
+    except StopAsyncIteration:
+        return None
+
+def _encode_position(timestamp: Optional[datetime], _id: ObjectId) -> str:
+    raw = json.dumps({
+        "t": timestamp.isoformat() if timestamp else None,
+        "id": str(_id),
+    })
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
 
-async def update_billing(billing_id: str, data: Dict[str, Any], db):
+def encode_billing_cursor(doc: Dict[str, Any]) -> str:
+    """Build an opaque cursor from the (created_at, _id) of the last bill on a page."""
+    return _encode_position(doc.get("created_at"), doc["_id"])
+
+def decode_billing_cursor(cursor: str) -> Tuple[Optional[datetime], ObjectId]:
+    """Inverse of encode_billing_cursor. Raises ValueError on a malformed cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        created_at = datetime.fromisoformat(raw["t"]) if raw["t"] else None
+        return created_at, ObjectId(raw["id"])
+    except (ValueError, KeyError, TypeError, InvalidId) as e:
+        raise ValueError("Invalid cursor") from e
+
+def _after_cursor_query(created_at: Optional[datetime], last_id: ObjectId) -> Dict[str, Any]:
+    """Range condition selecting everything after (created_at, _id) in BILLING_SORT order."""
+    if created_at is None:
+        # Bills without created_at sort last; only the _id tiebreak remains
+        return {"created_at": None, "_id": {"$lt": last_id}}
+    return {
+        "$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": last_id}},
+            {"created_at": None},
+        ]
+    }
+
+async def get_billings_page(
+    db,
+    limit: int = 100,
+    after: Optional[str] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    projection: Optional[Dict[str, Any]] = None,
+):
+    """
+    Keyset pagination over BILLING_SORT, across the hot collection and archives.
+    Returns (items, next_cursor); next_cursor is None on the last page.
+    """
+    query: Dict[str, Any] = dict(filters or {})
+    position = None
+    if after:
+        position = decode_billing_cursor(after)
+        query = {"$and": [query, _after_cursor_query(*position)]}
+
+    # Fetch one extra row to learn whether another page exists
+    partitions = await billing_partitions(db, *created_at_range(filters))
+    docs = await _find_across_partitions(partitions, query, limit + 1, projection=projection, after=position)
+
+    items = docs[:limit]
+    next_cursor = encode_billing_cursor(items[-1]) if len(docs) > limit else None
+    return items, next_cursor
+
+async def _raise_if_exists(coll, billing_id: str) -> None:
+    """After a versioned write matched nothing, tell a stale version apart from a missing bill."""
+    if await coll.find_one({"_id": ObjectId(billing_id)}, projection={"_id": 1}):
+        raise VersionConflict(billing_id)
+
+async def _raise_if_archived(db, billing_id: str) -> None:
+    """After a write matched nothing in billing, tell an archived bill apart from a missing one."""
+    if await find_archived_billing(db, ObjectId(billing_id), projection={"_id": 1}):
+        raise ArchivedBilling(billing_id)
+
+async def update_billing(billing_id: str, data: Dict[str, Any], db, expected_version: Optional[int] = None):
+    """
+    Apply a partial update in one round trip and return the updated document,
+    or None if the bill does not exist. With ``expected_version`` the write only
+    applies to that version; otherwise VersionConflict is raised.
+    """
     coll = billing_collection(db)
     # remove None values
     update_data = {k: v for k, v in data.items() if v is not None}
     if not update_data:
+        return None
+    update_data["changed_at"] = datetime.utcnow()
+
+    query: Dict[str, Any] = {"_id": ObjectId(billing_id)}
+    if expected_version is not None:
+        query.update(_version_filter(expected_version))
+
+    # The previous version is needed to move its totals out of the rollups
+    before = await coll.find_one_and_update(
+        query,
+        {"$set": update_data, "$inc": {"version": 1}},
+        return_document=ReturnDocument.BEFORE,
+    )
+    if not before:
+        if expected_version is not None:
+            await _raise_if_exists(coll, billing_id)
+        await _raise_if_archived(db, billing_id)
+        return None
+    updated = {**before, **update_data, "version": (before.get("version") or 0) + 1}
+    await apply_rollup_deltas(db, [(before, -1), (updated, 1)])
+    billing_events.publish_local("updated", updated)
+    return updated
+
+async def delete_billing(
+    billing_id: str,
+    db,
+    deleted_by: Optional[str] = None,
+    expected_version: Optional[int] = None,
+):
+    """Delete a bill and leave a tombstone so change feed clients learn about it."""
+    coll = billing_collection(db)
+    query: Dict[str, Any] = {"_id": ObjectId(billing_id)}
+    if expected_version is not None:
+        query.update(_version_filter(expected_version))
+
+    deleted = await coll.find_one_and_delete(query)
+    if not deleted:
+        if expected_version is not None:
+            await _raise_if_exists(coll, billing_id)
+        await _raise_if_archived(db, billing_id)
         return False
-    result = await coll.update_one({"_id": ObjectId(billing_id)}, {"$set": update_data})
-    return result.modified_count > 0
+    await apply_rollup_deltas(db, [(deleted, -1)])
+
+    await get_billing_deletion_collection(db).insert_one({
+        "billing_id": str(deleted["_id"]),
+        # Scoping fields, so the feed can apply the same filters as the list
+        "operator_id": deleted.get("operator_id"),
+        "farmer_id": deleted.get("farmer_id"),
+        "drone_id": deleted.get("drone_id"),
+        "deleted_at": datetime.utcnow(),
+        "deleted_by": deleted_by,
+    })
+    billing_events.publish_local("deleted", deleted)
+    return True
+
+# Lowest/highest ObjectId, for watermarks that sit before/after every entry of their timestamp
+MIN_OBJECT_ID = ObjectId("0" * 24)
+MAX_OBJECT_ID = ObjectId("f" * 24)
+
+def encode_changes_watermark(timestamp: datetime, _id: ObjectId = MIN_OBJECT_ID) -> str:
+    """Opaque change feed position: (changed_at or deleted_at, _id) of the last entry delivered."""
+    return _encode_position(timestamp, _id)
+
+def decode_changes_watermark(watermark: str) -> Tuple[datetime, ObjectId]:
+    """
+    Inverse of encode_changes_watermark. A plain ISO timestamp (the older
+    watermark format) means everything after that instant. Raises ValueError.
+    """
+    try:
+        return datetime.fromisoformat(watermark), MAX_OBJECT_ID
+    except ValueError:
+        pass
+    timestamp, _id = decode_billing_cursor(watermark)
+    if timestamp is None:
+        raise ValueError("Invalid watermark")
+    return timestamp, _id
+
+def _after_position(field: str, timestamp: datetime, _id: ObjectId, until: datetime) -> Dict[str, Any]:
+    """Entries after (timestamp, _id) in (field, _id) order, up to ``until``."""
+    return {"$and": [
+        {"$or": [{field: {"$gt": timestamp}}, {field: timestamp, "_id": {"$gt": _id}}]},
+        {field: {"$lte": until}},
+    ]}
+
+async def get_billing_changes(
+    db,
+    since: Tuple[datetime, ObjectId],
+    until: datetime,
+    limit: int = 500,
+    filters: Optional[Dict[str, Any]] = None,
+):
+    """
+    Bills inserted/updated and tombstones recorded after the ``since`` position
+    and no later than ``until``, oldest first, ties broken by _id.
+    Returns (items, deleted, watermark, has_more).
+
+    ``until`` should trail the clock by more than a write takes to commit, so a
+    bill stamped just before a read but committed after it is not skipped.
+    """
+    query: Dict[str, Any] = dict(filters or {})
+    items = await billing_collection(db).find(
+        {**query, **_after_position("changed_at", *since, until)}
+    ).sort([("changed_at", 1), ("_id", 1)]).limit(limit + 1).to_list(length=limit + 1)
+    tombstones = await get_billing_deletion_collection(db).find(
+        {**query, **_after_position("deleted_at", *since, until)}
+    ).sort([("deleted_at", 1), ("_id", 1)]).limit(limit + 1).to_list(length=limit + 1)
+
+    entries = sorted(
+        [(doc["changed_at"], doc["_id"], "item", doc) for doc in items]
+        + [(doc["deleted_at"], doc["_id"], "deleted", doc) for doc in tombstones],
+        key=lambda entry: entry[:2],
+    )
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    if entries:
+        watermark = encode_changes_watermark(*entries[-1][:2])
+    elif until > since[0]:
+        # Nothing matched up to until, so the next read can start there
+        watermark = encode_changes_watermark(until, MAX_OBJECT_ID)
+    else:
+        watermark = encode_changes_watermark(*since)
+    return (
+        [doc for _, _, kind, doc in entries if kind == "item"],
+        [
+            {"id": doc["billing_id"], "deleted_at": doc["deleted_at"]}
+            for _, _, kind, doc in entries if kind == "deleted"
+        ],
+        watermark,
+        has_more,
+    )
+
+async def get_billing_summary(db, group_by: Optional[str] = None, filters: Optional[Dict[str, Any]] = None):
+    """Aggregate count, sum and average of amount/acres/time in a single pipeline.
+
+    Returns overall totals and, when ``group_by`` is given, one row per group.
+    Served from the daily rollups when enabled and the filters allow it;
+    otherwise archived months in the filters' date range are unioned in.
+    """
+    if settings.BILLING_SUMMARY_FROM_ROLLUPS and set(filters or {}) <= ROLLUP_FILTER_FIELDS:
+        facet = await summarize_rollups(db, group_by=group_by, filters=filters)
+        return _format_summary(group_by, facet)
 
-async def delete_billing(billing_id: str, db):
     coll = billing_collection(db)
-    result = await coll.delete_one({"_id": ObjectId(billing_id)})
-    return result.deleted_count > 0
+    facets: Dict[str, List[Dict[str, Any]]] = {
+        "totals": [{"$group": {"_id": None, **_summary_accumulators()}}],
+    }
+    if group_by:
+        facets["groups"] = [
+            {"$group": {"_id": SUMMARY_GROUP_KEYS[group_by], **_summary_accumulators()}},
+            {"$sort": {"_id": 1}},
+        ]
+
+    match = filters or {}
+    partitions = await billing_partitions(db, *created_at_range(match))
+    pipeline = [{"$match": match}, *union_archives(partitions, match), {"$facet": facets}]
+    result = await coll.aggregate(pipeline).to_list(length=1)
+    return _format_summary(group_by, result[0] if result else {})
+
+def _format_summary(group_by: Optional[str], facet: Dict[str, Any]):
+    totals = facet.get("totals") or [{}]
+    return {
+        "group_by": group_by,
+        "totals": _summary_stats(totals[0]),
+        "groups": [
+            {"key": row["_id"], **_summary_stats(row)}
+            for row in facet.get("groups", [])
+        ],
+    }
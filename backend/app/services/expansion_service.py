@@ -0,0 +1,61 @@
+# Resolve the ids referenced by a page of bills into names, one batched query per collection
+import asyncio
+from typing import Any, Dict, List
+
+from bson import ObjectId
+
+from app.models.drone_model import get_drone_collection
+from app.models.farmer_model import get_farmer_collection
+from app.models.user_model import get_user_collection
+from app.services.reference_cache import reference_cache
+
+# expansion -> (billing field holding the id, reference cache kind or None, collection getter)
+BILLING_EXPANSIONS = {
+    "farmer": ("farmer_id", "farmers", get_farmer_collection),
+    "operator": ("operator_id", None, get_user_collection),
+    "drone": ("drone_id", "drones", get_drone_collection),
+}
+
+
+async def _resolve_names(db, expansion: str, ids: set) -> Dict[str, Any]:
+    """Names for ``ids``: from the reference cache where possible, then one $in query for the rest."""
+    _, cache_kind, get_collection = BILLING_EXPANSIONS[expansion]
+    names: Dict[str, Any] = {}
+    if cache_kind:
+        for id_ in ids:
+            cached = reference_cache.get(cache_kind, id_)
+            if cached:
+                names[id_] = cached.get("name")
+
+    # Ids that are not ObjectIds (e.g. free-text placeholders) cannot match anything
+    remaining = [ObjectId(id_) for id_ in ids - names.keys() if ObjectId.is_valid(id_)]
+    if remaining:
+        cursor = get_collection(db).find({"_id": {"$in": remaining}}, projection={"name": 1})
+        async for row in cursor:
+            names[str(row["_id"])] = row.get("name")
+    return names
+
+
+async def expand_billings(db, docs: List[Dict[str, Any]], expansions: List[str]) -> List[Dict[str, Any]]:
+    """
+    Embed {"_id", "name"} for each requested expansion into every bill in place
+    (None when the id does not resolve). Collections are queried concurrently,
+    at most once each, regardless of page size.
+    """
+    if not docs or not expansions:
+        return docs
+
+    id_sets = {
+        expansion: {doc[BILLING_EXPANSIONS[expansion][0]] for doc in docs if doc.get(BILLING_EXPANSIONS[expansion][0])}
+        for expansion in expansions
+    }
+    resolved = await asyncio.gather(*(
+        _resolve_names(db, expansion, ids) for expansion, ids in id_sets.items()
+    ))
+
+    for expansion, names in zip(id_sets, resolved):
+        field = BILLING_EXPANSIONS[expansion][0]
+        for doc in docs:
+            id_ = doc.get(field)
+            doc[expansion] = {"_id": id_, "name": names[id_]} if id_ in names else None
+    return docs
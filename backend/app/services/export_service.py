@@ -0,0 +1,52 @@
+# Encoders that turn an async stream of billing documents into CSV / NDJSON chunks
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict
+
+from bson import ObjectId
+
+BILLING_EXPORT_FIELDS = [
+    "id", "farmer_id", "operator_id", "drone_id", "acres", "time", "amount",
+    "mode_type", "created_at", "updated_at", "created_by", "updated_by",
+]
+
+# Rows are buffered into chunks of this many before being handed to the response
+ROWS_PER_CHUNK = 500
+
+def _export_value(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def _export_row(doc: Dict[str, Any]) -> Dict[str, Any]:
+    row = {"id": doc.get("_id")}
+    row.update({field: doc.get(field) for field in BILLING_EXPORT_FIELDS[1:]})
+    return {field: _export_value(value) for field, value in row.items()}
+
+async def stream_csv(docs: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=BILLING_EXPORT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    rows = 0
+    async for doc in docs:
+        writer.writerow(_export_row(doc))
+        rows += 1
+        if rows % ROWS_PER_CHUNK == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    yield buffer.getvalue()
+
+async def stream_ndjson(docs: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    lines = []
+    async for doc in docs:
+        lines.append(json.dumps(_export_row(doc)))
+        if len(lines) >= ROWS_PER_CHUNK:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
@@ -0,0 +1,151 @@
+# Hot/cold billing partitions: the live billing collection plus one archive collection per month
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from bson import ObjectId
+
+from app.cache import TTLCache
+from app.config import settings
+from app.models.billing_model import (
+    get_billing_collection,
+    get_billing_archive_collection,
+    BILLING_ARCHIVE_PATTERN,
+)
+from app.models.maintenance_model import get_maintenance_progress_collection
+
+# maintenance_progress document whose version changes whenever an archive collection is
+# created or dropped, so every process (API workers, scripts) knows to re-list them
+PARTITIONS_VERSION_ID = "billing_partitions"
+# db name -> (partitions version, archive names)
+_archive_names: Dict[str, Tuple[Any, List[str]]] = {}
+# db name -> archive names used without re-checking the version for BILLING_PARTITIONS_CHECK_SECONDS
+_checked_archive_names = TTLCache(maxsize=64, ttl=settings.BILLING_PARTITIONS_CHECK_SECONDS)
+
+
+class BillingPartition(NamedTuple):
+    collection: Any
+    # [start, end) of created_at held by an archive; None for the hot collection
+    start: Optional[datetime]
+    end: Optional[datetime]
+
+
+def month_start(year: int, month: int) -> datetime:
+    """First instant of a month; month may run past 12 or below 1."""
+    year, month = year + (month - 1) // 12, (month - 1) % 12 + 1
+    return datetime(year, month, 1)
+
+
+def archive_bounds(name: str) -> Tuple[datetime, datetime]:
+    """[start, end) of the month held by an archive collection."""
+    year, month = (int(part) for part in BILLING_ARCHIVE_PATTERN.match(name).groups())
+    return month_start(year, month), month_start(year, month + 1)
+
+
+def tier_cutoff(now: datetime, hot_months: int) -> datetime:
+    """Start of the oldest month kept hot: everything created before it is archived."""
+    return month_start(now.year, now.month - hot_months + 1)
+
+
+async def _partitions_version(db) -> Any:
+    doc = await get_maintenance_progress_collection(db).find_one(
+        {"_id": PARTITIONS_VERSION_ID}, projection={"version": 1}
+    )
+    return doc["version"] if doc else None
+
+
+async def list_billing_archives(db) -> List[str]:
+    """
+    Names of the monthly archive collections, oldest first. The list is cached
+    per process; at most once per BILLING_PARTITIONS_CHECK_SECONDS a read looks
+    up the partitions version, and only a changed version costs a listCollections.
+    """
+    names = _checked_archive_names.get(db.name)
+    if names is not None:
+        return names
+
+    version = await _partitions_version(db)
+    cached = _archive_names.get(db.name)
+    if cached is not None and cached[0] == version:
+        names = cached[1]
+    else:
+        names = sorted(await db.list_collection_names(filter={"name": {"$regex": BILLING_ARCHIVE_PATTERN.pattern}}))
+        _archive_names[db.name] = (version, names)
+    _checked_archive_names.set(db.name, names)
+    return names
+
+
+def invalidate_archive_list() -> None:
+    """Forget this process's cached archive list."""
+    _archive_names.clear()
+    _checked_archive_names.clear()
+
+
+async def bump_partitions_version(db) -> None:
+    """
+    Call after creating or dropping an archive collection. This process re-lists
+    on its next read, others within BILLING_PARTITIONS_CHECK_SECONDS.
+    """
+    invalidate_archive_list()
+    await get_maintenance_progress_collection(db).update_one(
+        {"_id": PARTITIONS_VERSION_ID},
+        {"$set": {"version": ObjectId(), "updated_at": datetime.utcnow()}},
+        upsert=True,
+    )
+
+
+def created_at_range(filters: Optional[Dict[str, Any]]) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """[start, end) of the created_at condition in billing filters, if any."""
+    condition = (filters or {}).get("created_at")
+    if not isinstance(condition, dict):
+        return None, None
+    start = condition.get("$gte", condition.get("$gt"))
+    end = condition.get("$lt")
+    if end is None and condition.get("$lte") is not None:
+        # Mongo dates have millisecond precision
+        end = condition["$lte"] + timedelta(milliseconds=1)
+    return start, end
+
+
+async def billing_partitions(
+    db,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> List[BillingPartition]:
+    """
+    The hot collection followed by the archives overlapping [start, end),
+    newest first. Archives never hold bills newer than their month, so a
+    reader walking this list can stop once it has enough newer bills.
+    """
+    partitions = [BillingPartition(get_billing_collection(db), None, None)]
+    for name in reversed(await list_billing_archives(db)):
+        archive_start, archive_end = archive_bounds(name)
+        if (start is not None and archive_end <= start) or (end is not None and archive_start >= end):
+            continue
+        partitions.append(BillingPartition(get_billing_archive_collection(db, name), archive_start, archive_end))
+    return partitions
+
+
+async def find_archived_billing(
+    db,
+    billing_id: ObjectId,
+    projection: Optional[Dict[str, Any]] = None,
+) -> Optional[Dict[str, Any]]:
+    """The archived bill with this _id, searched in every archive in one round trip, or None."""
+    names = await list_billing_archives(db)
+    if not names:
+        return None
+    match = {"$match": {"_id": billing_id}}
+    pipeline = [match, *({"$unionWith": {"coll": name, "pipeline": [match]}} for name in names[1:]), {"$limit": 1}]
+    if projection:
+        pipeline.append({"$project": projection})
+    docs = await get_billing_archive_collection(db, names[0]).aggregate(pipeline).to_list(length=1)
+    return docs[0] if docs else None
+
+
+def union_archives(partitions: List[BillingPartition], match: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """$unionWith stages adding the matching bills of every archive partition to a pipeline."""
+    return [
+        {"$unionWith": {"coll": partition.collection.name, "pipeline": [{"$match": match}]}}
+        for partition in partitions
+        if partition.start is not None
+    ]
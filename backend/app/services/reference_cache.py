@@ -0,0 +1,112 @@
+# In-memory copy of the small, mostly-read reference collections (drones, farmers, roles)
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.models.drone_model import get_drone_collection
+from app.models.farmer_model import get_farmer_collection
+from app.models.role_model import get_role_collection
+
+logger = logging.getLogger(__name__)
+
+# kind -> (collection getter, fields kept in memory)
+REFERENCE_COLLECTIONS = {
+    "drones": (get_drone_collection, {"name": 1, "model": 1, "serial_number": 1, "per_hour_rate": 1}),
+    "farmers": (get_farmer_collection, {"name": 1, "number": 1}),
+    "roles": (get_role_collection, {"name": 1}),
+}
+
+
+class ReferenceDataCache:
+    """
+    Versioned snapshot of drones, farmers and roles keyed by id string.
+
+    A refresh loads every collection and swaps the snapshot in one assignment,
+    so readers never see a half-loaded state; ``version`` increases on each
+    swap. Lookups never touch the database. A lookup miss may trigger one
+    refresh (at most every ``miss_refresh_seconds``) so newly added records
+    are picked up before the periodic refresh. Callers that queue behind a
+    refresh already in progress reuse its result instead of loading again.
+    """
+
+    def __init__(self, refresh_interval: float = 60.0, miss_refresh_seconds: float = 5.0):
+        self.refresh_interval = refresh_interval
+        self.miss_refresh_seconds = miss_refresh_seconds
+        self.version = 0
+        self.loaded_at: Optional[float] = None
+        self._data: Dict[str, Dict[str, Dict[str, Any]]] = {kind: {} for kind in REFERENCE_COLLECTIONS}
+        self._stale = True
+        # Bumped by invalidate(), so a refresh that started before a write does not clear _stale
+        self._generation = 0
+        self._lock = asyncio.Lock()
+
+    async def refresh(self, db, seen_version: Optional[int] = None) -> int:
+        """
+        Reload every reference collection and return the new version. With
+        ``seen_version`` (the version the caller found outdated), the reload is
+        skipped if another refresh completed while waiting for the lock.
+        """
+        async with self._lock:
+            if seen_version is not None and self.version != seen_version and not self._stale:
+                return self.version
+            generation = self._generation
+            data = {}
+            for kind, (get_collection, projection) in REFERENCE_COLLECTIONS.items():
+                docs = await get_collection(db).find({}, projection=projection).to_list(length=None)
+                data[kind] = {str(doc["_id"]): doc for doc in docs}
+            self._data = data
+            self.version += 1
+            self.loaded_at = time.monotonic()
+            self._stale = self._generation != generation
+            return self.version
+
+    async def ensure_loaded(self, db) -> None:
+        if self._stale:
+            await self.refresh(db, seen_version=self.version)
+
+    def invalidate(self) -> None:
+        """Call after writing drones, farmers or roles; the next lookup reloads."""
+        self._stale = True
+        self._generation += 1
+
+    def get(self, kind: str, id_: Optional[str]) -> Optional[Dict[str, Any]]:
+        return self._data[kind].get(id_) if id_ else None
+
+    def all(self, kind: str) -> List[Dict[str, Any]]:
+        return list(self._data[kind].values())
+
+    def drone_rate(self, drone_id: str) -> Optional[float]:
+        drone = self.get("drones", drone_id)
+        return drone.get("per_hour_rate") if drone else None
+
+    def _missing(self, refs: Dict[str, Optional[str]]) -> List[str]:
+        return [kind for kind, id_ in refs.items() if id_ is not None and id_ not in self._data[kind]]
+
+    async def missing_references(self, db, **refs: Optional[str]) -> List[str]:
+        """
+        Kinds (e.g. "farmers", "drones") whose id is not known, given kind=id pairs.
+        Served from memory; a miss refreshes once in case the record is new.
+        """
+        await self.ensure_loaded(db)
+        missing = self._missing(refs)
+        if missing and self.loaded_at is not None and time.monotonic() - self.loaded_at >= self.miss_refresh_seconds:
+            await self.refresh(db, seen_version=self.version)
+            missing = self._missing(refs)
+        return missing
+
+    async def run_periodic_refresh(self, db) -> None:
+        """Background task: reload every ``refresh_interval`` seconds."""
+        while True:
+            try:
+                await self.refresh(db)
+            except Exception as e:  # keep serving the last snapshot
+                logger.error("Reference data refresh failed: %s", e)
+            await asyncio.sleep(self.refresh_interval)
+
+
+reference_cache = ReferenceDataCache(
+    refresh_interval=settings.REFERENCE_CACHE_REFRESH_SECONDS,
+    miss_refresh_seconds=settings.REFERENCE_CACHE_MISS_REFRESH_SECONDS,
+)
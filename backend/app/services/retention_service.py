@@ -0,0 +1,189 @@
+# Purging or archiving bills older than a cutoff, in throttled batches that can resume after interruption
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from pymongo import ASCENDING, WriteConcern
+from pymongo.errors import BulkWriteError
+
+from app.models.billing_model import (
+    get_billing_collection,
+    get_billing_archive_collection,
+    get_billing_rollup_collection,
+    billing_archive_name,
+    BILLING_ARCHIVE_INDEXES,
+)
+from app.models.maintenance_model import get_maintenance_progress_collection
+from app.services.partition_service import (
+    archive_bounds,
+    bump_partitions_version,
+    invalidate_archive_list,
+    list_billing_archives,
+)
+from app.services.rollup_service import ROLLUP_KEY_FIELDS, ROLLUP_SUM_FIELDS, apply_rollup_deltas
+
+logger = logging.getLogger(__name__)
+
+RETENTION_MODES = ("purge", "archive")
+DUPLICATE_KEY = 11000
+OLDEST_FIRST = [("created_at", ASCENDING), ("_id", ASCENDING)]
+# What a purge needs to take a bill out of the rollups
+PURGE_PROJECTION = {
+    "created_at": 1,
+    **{field: 1 for field in ROLLUP_KEY_FIELDS if field != "day"},
+    **{field: 1 for field in ROLLUP_SUM_FIELDS},
+}
+
+# Archive partitions whose indexes were created by this process
+_indexed_archives = set()
+
+
+def retention_job_id(mode: str, cutoff: datetime) -> str:
+    return f"{mode}:billing:{cutoff.isoformat()}"
+
+
+async def archive_billings(db, docs: List[Dict[str, Any]]) -> None:
+    """
+    Copy bills into their month's archive collection. Bills keep their _id, so
+    copies left by an interrupted run are skipped as duplicates.
+    """
+    by_partition: Dict[str, List[Dict[str, Any]]] = {}
+    for doc in docs:
+        by_partition.setdefault(billing_archive_name(doc["created_at"]), []).append(doc)
+
+    for name, partition_docs in by_partition.items():
+        collection = get_billing_archive_collection(db, name)
+        if name not in _indexed_archives:
+            # Creates the collection; readers learn about it before any bill leaves billing
+            await collection.create_indexes(BILLING_ARCHIVE_INDEXES)
+            _indexed_archives.add(name)
+            await bump_partitions_version(db)
+        try:
+            await collection.insert_many(partition_docs, ordered=False)
+        except BulkWriteError as e:
+            details = e.details
+            if details.get("writeConcernErrors") or any(
+                error["code"] != DUPLICATE_KEY for error in details.get("writeErrors", [])
+            ):
+                raise
+
+
+def _older_than(cutoff: datetime, after: Optional[tuple]) -> Dict[str, Any]:
+    query: Dict[str, Any] = {"created_at": {"$lt": cutoff}}
+    if after is None:
+        return query
+    created_at, _id = after
+    return {"$and": [query, {"$or": [
+        {"created_at": {"$gt": created_at}},
+        {"created_at": created_at, "_id": {"$gt": _id}},
+    ]}]}
+
+
+async def count_old_billings(db, cutoff: datetime) -> int:
+    return await get_billing_collection(db).count_documents({"created_at": {"$lt": cutoff}})
+
+
+async def move_old_billings(
+    db,
+    cutoff: datetime,
+    mode: str,
+    batch_size: int = 1000,
+    pause: float = 0.0,
+    on_batch: Optional[Callable[[int], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Remove bills created before ``cutoff`` from ``billing``, oldest first,
+    ``batch_size`` at a time. ``archive`` copies each batch into the monthly
+    archive collections before deleting it; ``purge`` deletes and takes the
+    bills out of the rollups (archived bills stay in the rollups).
+
+    Deletes wait for a majority of the replica set, and the job sleeps
+    ``pause`` seconds between batches, so secondaries keep up. The position
+    is checkpointed in maintenance_progress after every batch; running the
+    same mode and cutoff again continues from there.
+    """
+    if mode not in RETENTION_MODES:
+        raise ValueError(f"mode must be one of {RETENTION_MODES}")
+
+    job_id = retention_job_id(mode, cutoff)
+    progress = get_maintenance_progress_collection(db)
+    state = await progress.find_one({"_id": job_id}) or {}
+    processed = state.get("processed", 0)
+    after = (state["last_created_at"], state["last_id"]) if state.get("last_id") is not None else None
+    resumed_from = processed
+
+    billing = get_billing_collection(db).with_options(write_concern=WriteConcern(w="majority"))
+    projection = PURGE_PROJECTION if mode == "purge" else None
+
+    while True:
+        docs = await (
+            billing.find(_older_than(cutoff, after), projection=projection)
+            .sort(OLDEST_FIRST)
+            .limit(batch_size)
+            .to_list(length=batch_size)
+        )
+        if not docs:
+            break
+
+        if mode == "archive":
+            await archive_billings(db, docs)
+        ids = [doc["_id"] for doc in docs]
+        result = await billing.delete_many({"_id": {"$in": ids}})
+        if mode == "purge":
+            if result.deleted_count != len(ids):
+                logger.warning(
+                    "%d of %d bills were already gone; run scripts/rebuild_rollups.py --check afterwards",
+                    len(ids) - result.deleted_count, len(ids),
+                )
+            await apply_rollup_deltas(db, [(doc, -1) for doc in docs])
+
+        after = (docs[-1]["created_at"], docs[-1]["_id"])
+        processed += len(docs)
+        await progress.update_one(
+            {"_id": job_id},
+            {
+                "$set": {
+                    "mode": mode,
+                    "cutoff": cutoff,
+                    "last_created_at": after[0],
+                    "last_id": after[1],
+                    "processed": processed,
+                    "updated_at": datetime.utcnow(),
+                },
+                "$setOnInsert": {"started_at": datetime.utcnow()},
+            },
+            upsert=True,
+        )
+        if on_batch is not None:
+            on_batch(processed)
+        if pause:
+            await asyncio.sleep(pause)
+
+    await progress.update_one(
+        {"_id": job_id},
+        {"$set": {"mode": mode, "cutoff": cutoff, "processed": processed, "finished_at": datetime.utcnow()}},
+        upsert=True,
+    )
+    return {"job_id": job_id, "processed": processed, "resumed_from": resumed_from}
+
+
+async def drop_expired_archives(db, cutoff: datetime) -> List[str]:
+    """
+    Drop archive collections whose whole month lies before ``cutoff`` and
+    remove those days from the rollups. Dropping a collection writes one oplog
+    entry instead of one per bill.
+    """
+    dropped = []
+    invalidate_archive_list()
+    for name in await list_billing_archives(db):
+        month_start, month_end = archive_bounds(name)
+        if month_end > cutoff:
+            continue
+        await db.drop_collection(name)
+        await get_billing_rollup_collection(db).delete_many({"day": {"$gte": month_start, "$lt": month_end}})
+        _indexed_archives.discard(name)
+        dropped.append(name)
+    if dropped:
+        await bump_partitions_version(db)
+    return dropped
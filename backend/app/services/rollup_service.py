@@ -0,0 +1,199 @@
+# Daily billing rollups: one row per day x operator x drone x mode_type, kept current with $inc deltas
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from app.models.billing_model import get_billing_collection, get_billing_rollup_collection
+from app.services.partition_service import BillingPartition, billing_partitions, created_at_range, union_archives
+
+ROLLUP_KEY_FIELDS = ("day", "operator_id", "drone_id", "mode_type")
+ROLLUP_SUM_FIELDS = ("amount", "acres", "time")
+
+# Billing filters that can be answered from rollups (farmer_id is not part of the key)
+ROLLUP_FILTER_FIELDS = {"operator_id", "drone_id", "mode_type"}
+
+# Rollup rows grouped the same way get_billing_summary groups bills
+ROLLUP_GROUP_KEYS: Dict[str, Any] = {
+    "month": {"$dateToString": {"format": "%Y-%m", "date": "$day"}},
+    "operator": "$operator_id",
+    "drone": "$drone_id",
+    "mode_type": "$mode_type",
+}
+
+# Floating point $inc drift below this is not reported by check_rollups
+TOLERANCE = 1e-6
+
+
+def _day(value: datetime) -> datetime:
+    return datetime(value.year, value.month, value.day)
+
+
+def rollup_key(doc: Dict[str, Any]) -> Optional[Tuple]:
+    """Rollup key of a billing document, or None if it has no created_at."""
+    created_at = doc.get("created_at")
+    if created_at is None:
+        return None
+    return (_day(created_at), doc.get("operator_id"), doc.get("drone_id"), doc.get("mode_type"))
+
+
+async def apply_rollup_deltas(db, changes: List[Tuple[Dict[str, Any], int]]) -> None:
+    """
+    Apply (billing document, +1/-1) changes to the rollups in one unordered bulk write.
+    Changes landing on the same key are merged first, so an update that keeps
+    its key costs a single $inc.
+    """
+    deltas: Dict[Tuple, Dict[str, float]] = {}
+    for doc, sign in changes:
+        key = rollup_key(doc)
+        if key is None:
+            continue
+        delta = deltas.setdefault(key, {"count": 0, **{f"{f}_sum": 0.0 for f in ROLLUP_SUM_FIELDS}})
+        delta["count"] += sign
+        for field in ROLLUP_SUM_FIELDS:
+            delta[f"{field}_sum"] += sign * (doc.get(field) or 0)
+
+    requests = [
+        UpdateOne(dict(zip(ROLLUP_KEY_FIELDS, key)), {"$inc": delta}, upsert=True)
+        for key, delta in deltas.items()
+        if any(delta.values())
+    ]
+    if requests:
+        await get_billing_rollup_collection(db).bulk_write(requests, ordered=False)
+
+
+def _day_range_match(start: Optional[datetime], end: Optional[datetime], field: str) -> Dict[str, Any]:
+    """Match [start day, end day] inclusive on ``field``."""
+    bounds: Dict[str, Any] = {}
+    if start:
+        bounds["$gte"] = _day(start)
+    if end:
+        bounds["$lt"] = _day(end) + timedelta(days=1)
+    return {field: bounds} if bounds else {}
+
+
+def _group_billing_pipeline(
+    start: Optional[datetime],
+    end: Optional[datetime],
+    partitions: List[BillingPartition] = (),
+) -> List[Dict[str, Any]]:
+    """Aggregate bills, including those in the given archive partitions, into rollup-shaped rows."""
+    match = _day_range_match(start, end, "created_at") or {"created_at": {"$ne": None}}
+    return [
+        {"$match": match},
+        *union_archives(partitions, match),
+        {"$group": {
+            "_id": {
+                "day": {"$dateFromParts": {
+                    "year": {"$year": "$created_at"},
+                    "month": {"$month": "$created_at"},
+                    "day": {"$dayOfMonth": "$created_at"},
+                }},
+                "operator_id": "$operator_id",
+                "drone_id": "$drone_id",
+                "mode_type": "$mode_type",
+            },
+            "count": {"$sum": 1},
+            **{f"{f}_sum": {"$sum": f"${f}"} for f in ROLLUP_SUM_FIELDS},
+        }},
+        {"$project": {
+            "_id": 0,
+            **{field: f"$_id.{field}" for field in ROLLUP_KEY_FIELDS},
+            "count": 1,
+            **{f"{f}_sum": 1 for f in ROLLUP_SUM_FIELDS},
+        }},
+    ]
+
+
+async def _partitions_for_days(db, start: Optional[datetime], end: Optional[datetime]) -> List[BillingPartition]:
+    return await billing_partitions(db, *created_at_range(_day_range_match(start, end, "created_at")))
+
+
+async def rebuild_rollups(db, start: Optional[datetime] = None, end: Optional[datetime] = None) -> int:
+    """
+    Recompute rollups from billing and its archives for the given days (all when omitted).
+    Writes that land in the range while this runs may be lost; run check_rollups afterwards.
+    Returns the number of rollup rows written.
+    """
+    rollups = get_billing_rollup_collection(db)
+    await rollups.delete_many(_day_range_match(start, end, "day"))
+
+    partitions = await _partitions_for_days(db, start, end)
+    pipeline = _group_billing_pipeline(start, end, partitions) + [{
+        "$merge": {
+            "into": rollups.name,
+            "on": list(ROLLUP_KEY_FIELDS),
+            "whenMatched": "replace",
+            "whenNotMatched": "insert",
+        }
+    }]
+    await get_billing_collection(db).aggregate(pipeline).to_list(length=None)
+    return await rollups.count_documents(_day_range_match(start, end, "day"))
+
+
+def _differs(expected: Dict[str, Any], actual: Dict[str, Any]) -> bool:
+    if expected.get("count", 0) != actual.get("count", 0):
+        return True
+    for field in ROLLUP_SUM_FIELDS:
+        a, b = expected.get(f"{field}_sum", 0), actual.get(f"{field}_sum", 0)
+        if abs(a - b) > TOLERANCE * max(1.0, abs(a), abs(b)):
+            return True
+    return False
+
+
+async def check_rollups(db, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Dict[str, Any]:
+    """Compare rollups against a fresh aggregation of the bills and list every mismatching key."""
+    expected = {
+        tuple(row[f] for f in ROLLUP_KEY_FIELDS): row
+        for row in await get_billing_collection(db).aggregate(
+            _group_billing_pipeline(start, end, await _partitions_for_days(db, start, end))
+        ).to_list(length=None)
+    }
+    actual = {
+        tuple(row.get(f) for f in ROLLUP_KEY_FIELDS): row
+        async for row in get_billing_rollup_collection(db).find(_day_range_match(start, end, "day"))
+    }
+
+    mismatches = []
+    for key in expected.keys() | actual.keys():
+        exp, act = expected.get(key, {}), actual.get(key, {})
+        if _differs(exp, act):
+            mismatches.append({
+                "key": dict(zip(ROLLUP_KEY_FIELDS, key)),
+                "expected": {k: v for k, v in exp.items() if k not in ROLLUP_KEY_FIELDS},
+                "actual": {k: v for k, v in act.items() if k not in ROLLUP_KEY_FIELDS and k != "_id"},
+            })
+    return {"checked": len(expected.keys() | actual.keys()), "mismatches": mismatches}
+
+
+async def summarize_rollups(db, group_by: Optional[str] = None, filters: Optional[Dict[str, Any]] = None):
+    """
+    get_billing_summary over rollup rows instead of bills.
+    Returns {"totals": [row], "groups": [rows]} shaped like the billing $facet output.
+    """
+    def stages(group_id):
+        return [
+            {"$group": {
+                "_id": group_id,
+                "count": {"$sum": "$count"},
+                **{f"{f}_sum": {"$sum": f"${f}_sum"} for f in ROLLUP_SUM_FIELDS},
+            }},
+            {"$addFields": {
+                f"{f}_avg": {"$cond": [
+                    {"$gt": ["$count", 0]}, {"$divide": [f"${f}_sum", "$count"]}, 0
+                ]}
+                for f in ROLLUP_SUM_FIELDS
+            }},
+        ]
+
+    facets = {"totals": stages(None)}
+    if group_by:
+        facets["groups"] = stages(ROLLUP_GROUP_KEYS[group_by]) + [
+            {"$match": {"count": {"$gt": 0}}},
+            {"$sort": {"_id": 1}},
+        ]
+
+    # Rows emptied by deletes keep count 0 and are skipped
+    pipeline = [{"$match": {**(filters or {}), "count": {"$gt": 0}}}, {"$facet": facets}]
+    result = await get_billing_rollup_collection(db).aggregate(pipeline).to_list(length=1)
+    return result[0] if result else {}
@@ -1,52 +1,88 @@
 from bson import ObjectId
-from typing import Optional
+from typing import Dict, Optional
+from pymongo import ReturnDocument
+from app.cache import TTLCache
+from app.config import settings
+from app.metrics import cache_metrics
+
+# Never read the bcrypt hash unless authenticating
+WITHOUT_PASSWORD = {"password": 0}
+
+# Users resolved by get_current_user, keyed by user id string.
+# Every write below invalidates its entry so role/active changes apply at once.
+user_cache = TTLCache(maxsize=settings.USER_CACHE_MAX_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
+cache_metrics.register("user", user_cache)
+# user id -> number of invalidations; a read that overlapped one must not cache what it read
+_user_generations: Dict[str, int] = {}
 
 def user_collection(db):
     return db["users"]
 
+async def get_cached_user(user_id: str, db):
+    """Get user by ID for authentication, served from user_cache when fresh"""
+    user = user_cache.get(user_id)
+    if user is None:
+        generation = _user_generations.get(user_id, 0)
+        user = await user_collection(db).find_one({"_id": ObjectId(user_id)}, projection=WITHOUT_PASSWORD)
+        if not user:
+            return None
+        # A write invalidated the user while we were reading; what we read may be the old version
+        if _user_generations.get(user_id, 0) == generation:
+            user_cache.set(user_id, user)
+    # Callers get their own copy so they cannot mutate the cached entry
+    return dict(user)
+
+def invalidate_cached_user(user_id) -> None:
+    user_id = str(user_id)
+    _user_generations[user_id] = _user_generations.get(user_id, 0) + 1
+    user_cache.invalidate(user_id)
+
 async def create_user(data, db):
     result = await user_collection(db).insert_one(data)
     return str(result.inserted_id)
 
-async def get_user_by_id(user_id, db, exclude_password=True):
-    """Get user by ID, optionally excluding password"""
-    user = await user_collection(db).find_one({"_id": ObjectId(user_id)})
-    if user and exclude_password:
-        user.pop("password", None)
-    return user
+async def get_user_by_id(user_id, db, exclude_password=True, projection=None):
+    """Get user by ID; the password is excluded in the query unless asked for"""
+    if projection is None and exclude_password:
+        projection = WITHOUT_PASSWORD
+    return await user_collection(db).find_one({"_id": ObjectId(user_id)}, projection=projection)
 
 async def get_user_by_email(email: str, db):
     """Get user by email"""
     return await user_collection(db).find_one({"email": email})
 
-async def get_all_users(db, skip: int = 0, limit: int = 100, exclude_password=True):
-    """Get all users with pagination"""
-    cursor = user_collection(db).find({}).skip(skip).limit(limit)
-    users = await cursor.to_list(length=limit)
-    
-    if exclude_password:
-        for user in users:
-            user.pop("password", None)
-    
-    return users
+async def get_all_users(db, skip: int = 0, limit: int = 100, exclude_password=True, projection=None):
+    """Get all users with pagination; the password is excluded in the query unless asked for"""
+    if projection is None and exclude_password:
+        projection = WITHOUT_PASSWORD
+    cursor = user_collection(db).find({}, projection=projection).skip(skip).limit(limit)
+    return await cursor.to_list(length=limit)
 
 async def update_user(user_id, data, db):
-    """Update user data"""
+    """
+    Update user data in one round trip and return the updated user (without password),
+    or None if the user does not exist.
+    Raises DuplicateKeyError when the new email is taken (unique email index).
+    """
     # Remove None values
     update_data = {k: v for k, v in data.items() if v is not None}
     
     if not update_data:
-        return True
+        return await get_user_by_id(user_id, db)
     
-    result = await user_collection(db).update_one(
+    updated = await user_collection(db).find_one_and_update(
         {"_id": ObjectId(user_id)},
-        {"$set": update_data}
+        {"$set": update_data},
+        projection={"password": 0},
+        return_document=ReturnDocument.AFTER
     )
-    return result.modified_count > 0
+    invalidate_cached_user(user_id)
+    return updated
 
 async def delete_user(user_id, db):
     """Delete user (hard delete)"""
     result = await user_collection(db).delete_one({"_id": ObjectId(user_id)})
+    invalidate_cached_user(user_id)
     return result.deleted_count > 0
 
 async def soft_delete_user(user_id, db):
@@ -55,4 +91,5 @@ async def soft_delete_user(user_id, db):
         {"_id": ObjectId(user_id)},
         {"$set": {"is_active": False}}
     )
+    invalidate_cached_user(user_id)
     return result.modified_count > 0
@@ -0,0 +1,252 @@
+# Slow-operation recorder: Mongo commands over a threshold, grouped by redacted query shape, with sampled explains
+import asyncio
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+
+from app.config import settings
+from app.indexes import plan_stages
+
+logger = logging.getLogger(__name__)
+
+# Driver chatter and our own explains are never recorded
+IGNORED_COMMANDS = {
+    "hello", "ismaster", "isMaster", "ping", "buildinfo", "buildInfo", "endSessions",
+    "killCursors", "saslStart", "saslContinue", "explain", "getMore",
+}
+# Read commands re-run with explain("executionStats"); writes are recorded but not explained
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct"}
+# Command fields copied into the explain; session, cluster time and read preference are left out
+_EXPLAIN_FIELDS = ("filter", "sort", "projection", "skip", "limit", "hint", "collation", "pipeline", "query", "key")
+
+
+def redact(value: Any) -> Any:
+    """
+    Replace literal values with "?" and keep the structure: field names,
+    operators and $field references. Lists of scalars (e.g. $in) collapse to
+    one placeholder so their length does not create new shapes.
+    """
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if any(isinstance(item, (dict, list, tuple)) for item in value):
+            return [redact(item) for item in value]
+        return ["?"] if value else []
+    if isinstance(value, str) and value.startswith("$"):
+        return value
+    return "?"
+
+
+def command_shape(command_name: str, command: Dict[str, Any]) -> Dict[str, Any]:
+    """Redacted filter (and sort or pipeline) of a command."""
+    if command_name == "find":
+        return {"filter": redact(command.get("filter", {})), "sort": command.get("sort")}
+    if command_name == "aggregate":
+        return {"pipeline": redact(command.get("pipeline", []))}
+    if command_name in ("count", "distinct"):
+        return {"filter": redact(command.get("query", {})), "key": command.get("key")}
+    if command_name == "findAndModify":
+        return {"filter": redact(command.get("query", {})), "sort": command.get("sort")}
+    if command_name in ("update", "delete"):
+        statements = command.get("updates") or command.get("deletes") or []
+        return {"filter": redact(statements[0].get("q", {})) if statements else {}}
+    return {}
+
+
+def _documents_returned(reply: Dict[str, Any]) -> int:
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        return len(cursor.get("firstBatch") or ())
+    if "value" in reply:
+        return 1 if reply["value"] is not None else 0
+    return reply.get("n", 0) if isinstance(reply.get("n"), int) else 0
+
+
+def _explain_command(command_name: str, command: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    if command_name not in EXPLAINABLE_COMMANDS:
+        return None
+    pipeline = command.get("pipeline") or []
+    if any("$out" in stage or "$merge" in stage for stage in pipeline):
+        return None  # explain would not write, but keep writes out of the sampler entirely
+    explained = {command_name: command[command_name]}
+    explained.update({field: command[field] for field in _EXPLAIN_FIELDS if field in command})
+    if command_name == "aggregate":
+        explained["cursor"] = {}
+    return explained
+
+
+def _find_execution_stats(explain: Any) -> Dict[str, Any]:
+    """executionStats sit at the top for find, under a $cursor stage for some pipelines."""
+    if isinstance(explain, dict):
+        if "executionStats" in explain:
+            return explain["executionStats"]
+        for value in explain.values():
+            found = _find_execution_stats(value)
+            if found:
+                return found
+    elif isinstance(explain, list):
+        for item in explain:
+            found = _find_execution_stats(item)
+            if found:
+                return found
+    return {}
+
+
+def summarize_explain(explain: Dict[str, Any]) -> Dict[str, Any]:
+    stats = _find_execution_stats(explain)
+    return {
+        "docs_examined": stats.get("totalDocsExamined"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "returned": stats.get("nReturned"),
+        "execution_ms": stats.get("executionTimeMillis"),
+        "stages": sorted(set(plan_stages(explain))),
+        "explained_at": datetime.utcnow(),
+    }
+
+
+class SlowQueryRecorder:
+    """
+    Aggregates slow commands by (collection, command, redacted shape).
+
+    ``record`` is called from pymongo's listener threads, so shape entries are
+    guarded by a lock. Explains cannot run inside a listener; they are handed
+    to ``run_explainer`` on the event loop, at most once per shape every
+    ``explain_interval`` seconds.
+    """
+
+    def __init__(self, threshold_ms: float, explain_interval: float = 300.0, max_shapes: int = 500):
+        self.threshold_ms = threshold_ms
+        self.explain_interval = explain_interval
+        self.max_shapes = max_shapes
+        self.dropped = 0
+        self._shapes: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms > 0
+
+    def record(self, database: str, command_name: str, command: Dict[str, Any], ms: float, returned: int) -> None:
+        collection = command.get(command_name)
+        shape = command_shape(command_name, command)
+        key = json.dumps([collection, command_name, shape], sort_keys=True, default=str)
+        logger.warning(
+            "Slow %s on %s.%s: %.1f ms, %d returned, shape %s",
+            command_name, database, collection, ms, returned, json.dumps(shape, default=str),
+        )
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._shapes.get(key)
+            if entry is None:
+                if len(self._shapes) >= self.max_shapes:
+                    self.dropped += 1
+                    return
+                entry = self._shapes[key] = {
+                    "collection": collection,
+                    "command": command_name,
+                    "shape": shape,
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "docs_returned": 0,
+                    "explain": None,
+                    "_explain_requested": None,
+                }
+            entry["count"] += 1
+            entry["total_ms"] += ms
+            entry["max_ms"] = max(entry["max_ms"], ms)
+            entry["docs_returned"] += returned
+            entry["last_seen"] = datetime.utcnow()
+            requested = entry["_explain_requested"]
+            explain_due = requested is None or now - requested >= self.explain_interval
+            if explain_due:
+                entry["_explain_requested"] = now
+
+        if explain_due:
+            explain = _explain_command(command_name, command)
+            if explain is not None:
+                self._submit_explain((key, database, explain))
+
+    def _submit_explain(self, item: Tuple[str, str, Dict[str, Any]]) -> None:
+        if self._loop is None:
+            return  # no explainer running (scripts, tests)
+        self._loop.call_soon_threadsafe(self._enqueue, item)
+
+    def _enqueue(self, item) -> None:
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            pass  # the next slow run of this shape will ask again
+
+    async def run_explainer(self, client) -> None:
+        """Background task: run queued explains on ``client`` and attach the summaries."""
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=100)
+        try:
+            while True:
+                key, database, command = await self._queue.get()
+                try:
+                    explain = await client[database].command({"explain": command, "verbosity": "executionStats"})
+                except Exception as e:
+                    logger.error("Explain for slow query failed: %s", e)
+                    continue
+                summary = summarize_explain(explain)
+                with self._lock:
+                    if key in self._shapes:
+                        self._shapes[key]["explain"] = summary
+        finally:
+            self._loop = None
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Shapes ordered by total time spent, slowest first."""
+        with self._lock:
+            entries = [
+                {k: v for k, v in entry.items() if not k.startswith("_")}
+                for entry in self._shapes.values()
+            ]
+        for entry in entries:
+            entry["avg_ms"] = entry["total_ms"] / entry["count"]
+        return sorted(entries, key=lambda entry: entry["total_ms"], reverse=True)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._shapes.clear()
+            self.dropped = 0
+
+
+class SlowQueryListener(monitoring.CommandListener):
+    """Feeds commands slower than the recorder's threshold into it."""
+
+    def __init__(self, recorder: SlowQueryRecorder):
+        self.recorder = recorder
+        # (connection, request id) -> (database, command) of commands in flight
+        self._pending: Dict[Tuple[Any, int], Tuple[str, Dict[str, Any]]] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if event.command_name not in IGNORED_COMMANDS:
+            self._pending[(event.connection_id, event.request_id)] = (event.database_name, event.command)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        pending = self._pending.pop((event.connection_id, event.request_id), None)
+        ms = event.duration_micros / 1000
+        if pending is not None and ms >= self.recorder.threshold_ms:
+            database, command = pending
+            self.recorder.record(database, event.command_name, command, ms, _documents_returned(event.reply))
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._pending.pop((event.connection_id, event.request_id), None)
+
+
+slow_queries = SlowQueryRecorder(
+    threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+    explain_interval=settings.SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS,
+    max_shapes=settings.SLOW_QUERY_MAX_SHAPES,
+)
@@ -0,0 +1,76 @@
+"""
+JWT claims cache benchmark - times get_current_user with and without the
+verified-claims cache in app.security.jwt_handler.
+
+The user cache is warm in both runs, so the difference is the JWT decode and
+HMAC check. Needs mongomock-motor for the in-memory users collection.
+
+Usage:
+    python3 benchmarks/auth_cache.py --calls 20000 --tokens 50
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from fastapi.security import HTTPAuthorizationCredentials
+from mongomock_motor import AsyncMongoMockClient
+from app.dependencies import get_current_user
+from app.security.jwt_handler import claims_cache, create_access_token
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def run(mode: str, db, tokens, calls: int):
+    maxsize = claims_cache.maxsize
+    if mode == "no cache":
+        claims_cache.maxsize = 0
+    claims_cache.clear()
+    claims_cache.hits = claims_cache.misses = 0
+
+    credentials = [HTTPAuthorizationCredentials(scheme="Bearer", credentials=token) for token in tokens]
+    latencies = []
+    try:
+        start = time.perf_counter()
+        for i in range(calls):
+            call_start = time.perf_counter()
+            await get_current_user(credentials[i % len(credentials)], db)
+            latencies.append((time.perf_counter() - call_start) * 1_000_000)
+        elapsed = time.perf_counter() - start
+    finally:
+        claims_cache.maxsize = maxsize
+
+    return {
+        "mode": mode,
+        "calls/s": calls / elapsed,
+        "p50_us": statistics.median(latencies),
+        "p99_us": percentile(latencies, 99),
+        "hit_rate": claims_cache.stats()["hit_rate"],
+    }
+
+async def main(args):
+    db = AsyncMongoMockClient()["auth_cache_bench"]
+    result = await db.users.insert_one({"name": "Bench", "email": "bench@example.com", "role_id": 2, "is_active": True})
+    # Several clients (tokens) for the same user, each re-sending its token
+    tokens = [create_access_token({"sub": str(result.inserted_id), "n": n}) for n in range(args.tokens)]
+
+    print(f"{'mode':<10} {'calls/s':>10} {'p50 µs':>8} {'p99 µs':>8} {'hit rate':>9}")
+    for mode in ("no cache", "cache"):
+        result = await run(mode, db, tokens, args.calls)
+        print(
+            f"{result['mode']:<10} {result['calls/s']:>10.0f} {result['p50_us']:>8.1f} "
+            f"{result['p99_us']:>8.1f} {result['hit_rate']:>9.1%}"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="get_current_user with and without the JWT claims cache")
+    parser.add_argument("--calls", type=int, default=20000, help="get_current_user calls per run")
+    parser.add_argument("--tokens", type=int, default=50, help="distinct tokens sent round-robin")
+    asyncio.run(main(parser.parse_args()))
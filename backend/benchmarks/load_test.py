@@ -0,0 +1,332 @@
+"""
+HTTP load test - drives a weighted mix of API requests through the ASGI app
+with concurrent async clients and reports req/s and p50/p95/p99 per endpoint.
+
+The app runs in-process (httpx ASGITransport), either against MongoDB, in a
+throwaway database that is seeded before and dropped after the run, or with
+--in-memory against mongomock-motor (pip install mongomock-motor). In-memory
+numbers measure the API layer only; use a real MongoDB for release checks.
+
+Save a baseline once, then compare later runs against it; the script exits
+with status 1 when an endpoint regresses by more than --threshold.
+
+Usage:
+    python3 benchmarks/load_test.py --in-memory --duration 10 --save-baseline benchmarks/baseline.json
+    python3 benchmarks/load_test.py --in-memory --duration 10 --baseline benchmarks/baseline.json
+    python3 benchmarks/load_test.py --mongo-url mongodb://localhost:27017 --mix login=1,list=10,create=3,me=6
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import httpx
+
+PASSWORD = "password123"
+DEFAULT_MIX = "login=1,list=10,create=3,me=6"
+ENDPOINTS = {
+    "login": "POST /auth/login",
+    "list": "GET /billing/",
+    "create": "POST /billing/",
+    "me": "GET /users/me",
+}
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def parse_mix(value: str):
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"unknown operation '{name}', expected one of {', '.join(ENDPOINTS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+async def seed(db, operators: int, farmers: int, drones: int, bills: int, rng: random.Random):
+    """Operators share one password hash; bills are spread over the last year."""
+    from app.security.hash import hash_password
+
+    password_hash = hash_password(PASSWORD)
+    now = datetime.utcnow()
+    users = [
+        {
+            "name": f"Bench Operator {i}",
+            "email": f"bench-operator-{i}@example.com",
+            "password": password_hash,
+            "role_id": 2,
+            "is_active": True,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(operators)
+    ]
+    operator_ids = [str(_id) for _id in (await db.users.insert_many(users)).inserted_ids]
+    farmer_ids = [
+        str(_id) for _id in (await db.farmers.insert_many(
+            [{"name": f"Bench Farmer {i}", "number": f"9{i:09d}"} for i in range(farmers)]
+        )).inserted_ids
+    ]
+    drone_docs = [
+        {"name": f"Bench Drone {i}", "model": "T30", "serial_number": f"BENCH-{i:04d}",
+         "per_hour_rate": rng.choice([1500.0, 1800.0, 2000.0])}
+        for i in range(drones)
+    ]
+    drone_ids = [str(_id) for _id in (await db.drone_details.insert_many(drone_docs)).inserted_ids]
+    rates = dict(zip(drone_ids, (d["per_hour_rate"] for d in drone_docs)))
+
+    docs = []
+    for _ in range(bills):
+        drone_id = rng.choice(drone_ids)
+        hours = round(rng.uniform(0.5, 4), 2)
+        created_at = now - timedelta(seconds=rng.randint(0, 365 * 86400))
+        docs.append({
+            "farmer_id": rng.choice(farmer_ids),
+            "operator_id": rng.choice(operator_ids),
+            "drone_id": drone_id,
+            "acres": round(rng.uniform(1, 20), 2),
+            "time": hours,
+            "amount": round(hours * rates[drone_id], 2),
+            "mode_type": rng.choice(["cash", "upi"]),
+            "created_at": created_at,
+            "changed_at": created_at,
+            "version": 1,
+        })
+    if docs:
+        await db.billing.insert_many(docs, ordered=False)
+    return operator_ids, farmer_ids, drone_ids, rates
+
+class VirtualUser:
+    """One logged-in operator issuing requests from the mix."""
+
+    def __init__(self, client, index, operator_id, farmer_ids, drone_ids, rates, rng):
+        self.client = client
+        self.email = f"bench-operator-{index}@example.com"
+        self.operator_id = operator_id
+        self.farmer_ids = farmer_ids
+        self.drone_ids = drone_ids
+        self.rates = rates
+        self.rng = rng
+        self.headers = {}
+
+    async def login(self):
+        response = await self.client.post("/auth/login", json={"email": self.email, "password": PASSWORD})
+        if response.status_code == 200:
+            self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        return response
+
+    async def list(self):
+        params = {"limit": 20}
+        if self.rng.random() < 0.5:
+            params["farmer_id"] = self.rng.choice(self.farmer_ids)
+        return await self.client.get("/billing/", params=params, headers=self.headers)
+
+    async def create(self):
+        drone_id = self.rng.choice(self.drone_ids)
+        hours = round(self.rng.uniform(0.5, 4), 2)
+        payload = {
+            "farmer_id": self.rng.choice(self.farmer_ids),
+            "operator_id": self.operator_id,
+            "drone_id": drone_id,
+            "acres": round(self.rng.uniform(1, 20), 2),
+            "time": hours,
+            "amount": round(hours * self.rates[drone_id], 2),
+            "mode_type": self.rng.choice(["cash", "upi"]),
+        }
+        return await self.client.post("/billing/", json=payload, headers=self.headers)
+
+    async def me(self):
+        return await self.client.get("/users/me", headers=self.headers)
+
+async def drive(users, mix, duration, warmup, rng):
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    latencies = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    start = time.perf_counter()
+    measure_from = start + warmup
+    deadline = measure_from + duration
+
+    async def worker(user):
+        while True:
+            name = rng.choices(names, weights)[0]
+            began = time.perf_counter()
+            if began >= deadline:
+                return
+            response = await getattr(user, name)()
+            ended = time.perf_counter()
+            if began >= measure_from:
+                latencies[name].append((ended - began) * 1000)
+                if response.status_code >= 400:
+                    errors[name] += 1
+
+    await asyncio.gather(*(worker(user) for user in users))
+    return latencies, errors, duration
+
+def summarize(latencies, errors, elapsed):
+    results = {}
+    for name, samples in latencies.items():
+        if not samples:
+            continue
+        results[ENDPOINTS[name]] = {
+            "requests": len(samples),
+            "errors": errors[name],
+            "rps": len(samples) / elapsed,
+            "p50_ms": statistics.median(samples),
+            "p95_ms": percentile(samples, 95),
+            "p99_ms": percentile(samples, 99),
+        }
+    return results
+
+def print_results(results):
+    print(f"{'endpoint':<18} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for endpoint, r in results.items():
+        print(
+            f"{endpoint:<18} {r['requests']:>9} {r['errors']:>7} {r['rps']:>8.1f} "
+            f"{r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f}"
+        )
+
+def compare(results, baseline, threshold):
+    """Print the change per endpoint; return the regressions beyond threshold."""
+    regressions = []
+    print(f"\nAgainst baseline (threshold {threshold:.0%}):")
+    for endpoint, base in baseline["endpoints"].items():
+        current = results.get(endpoint)
+        if current is None:
+            print(f"  {endpoint:<18} missing from this run")
+            continue
+        checks = {
+            "req/s": (base["rps"] - current["rps"]) / base["rps"],
+            "p50": (current["p50_ms"] - base["p50_ms"]) / base["p50_ms"],
+            "p95": (current["p95_ms"] - base["p95_ms"]) / base["p95_ms"],
+        }
+        worse = [metric for metric, change in checks.items() if change > threshold]
+        changes = "  ".join(f"{metric} {-change if metric == 'req/s' else change:+.0%}" for metric, change in checks.items())
+        print(f"  {endpoint:<18} {changes}{'  REGRESSION' if worse else ''}")
+        regressions.extend(f"{endpoint} {metric}" for metric in worse)
+    return regressions
+
+async def run(args):
+    # Settings are read at import, so choose the database before loading the app
+    os.environ["DB_NAME"] = args.db_name
+    if not args.rate_limit:
+        # Every virtual client shares one IP and logs in repeatedly
+        os.environ["AUTH_RATE_LIMIT_BACKEND"] = "none"
+    if args.mongo_url:
+        os.environ["MONGO_URL"] = args.mongo_url
+    from app.main import app
+    from app.db import get_db, get_analytics_db
+    from app import db as database
+
+    rng = random.Random(args.seed)
+    async with contextlib.AsyncExitStack() as stack:
+        if args.in_memory:
+            from mongomock_motor import AsyncMongoMockClient
+
+            db = AsyncMongoMockClient()[args.db_name]
+
+            async def _get_db():
+                return db
+
+            app.dependency_overrides[get_db] = _get_db
+            app.dependency_overrides[get_analytics_db] = _get_db
+        else:
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            db = database.db
+            stack.push_async_callback(database.client.drop_database, args.db_name)
+
+        print(f"🌱 Seeding {args.operators} operators, {args.bills} bills into {args.db_name}...")
+        operator_ids, farmer_ids, drone_ids, rates = await seed(
+            db, args.operators, args.farmers, args.drones, args.bills, rng
+        )
+
+        transport = httpx.ASGITransport(app=app)
+        limits = httpx.Limits(max_connections=None)
+        client = await stack.enter_async_context(
+            httpx.AsyncClient(transport=transport, base_url="http://bench", limits=limits)
+        )
+        users = [
+            VirtualUser(client, i % args.operators, operator_ids[i % args.operators], farmer_ids, drone_ids, rates,
+                        random.Random(args.seed + i))
+            for i in range(args.concurrency)
+        ]
+
+        print(f"🚀 {args.concurrency} clients, {args.duration:.0f}s (+{args.warmup:.0f}s warmup), mix {args.mix_text}")
+        await asyncio.gather(*(user.login() for user in users))
+        latencies, errors, elapsed = await drive(users, args.mix, args.duration, args.warmup, rng)
+    return summarize(latencies, errors, elapsed)
+
+def main(args):
+    results = asyncio.run(run(args))
+    print()
+    print_results(results)
+
+    failed = False
+    for endpoint, r in results.items():
+        if r["errors"] / r["requests"] > args.max_error_rate:
+            print(f"❌ {endpoint}: {r['errors']} of {r['requests']} requests failed")
+            failed = True
+
+    report = {
+        "endpoints": results,
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(),
+            "mix": args.mix_text,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "backend": "in-memory" if args.in_memory else "mongodb",
+        },
+    }
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(report, indent=2))
+        print(f"\n💾 Baseline written to {args.save_baseline}")
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        if baseline["meta"].get("backend") != report["meta"]["backend"]:
+            print(f"⚠️  Baseline was recorded with {baseline['meta'].get('backend')}, this run uses {report['meta']['backend']}")
+        for key in ("mix", "concurrency"):
+            if baseline["meta"].get(key) != report["meta"][key]:
+                print(f"⚠️  Baseline {key} was {baseline['meta'].get(key)}, this run uses {report['meta'][key]}")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"❌ Regressions: {', '.join(regressions)}")
+            failed = True
+        else:
+            print("✅ No regressions")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the API with a weighted request mix")
+    parser.add_argument("--in-memory", action="store_true", help="use mongomock-motor instead of MongoDB")
+    parser.add_argument("--mongo-url", help="MongoDB URL (default: MONGO_URL from settings)")
+    parser.add_argument("--rate-limit", action="store_true", help="keep the login rate limiter on (off by default)")
+    parser.add_argument("--db-name", default="shamuga_drone_bench", help="throwaway database, dropped after the run")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"weights per operation (default: {DEFAULT_MIX})")
+    parser.add_argument("--concurrency", type=int, default=20, help="concurrent clients")
+    parser.add_argument("--duration", type=float, default=10, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=1, help="seconds before measuring starts")
+    parser.add_argument("--operators", type=int, default=20)
+    parser.add_argument("--farmers", type=int, default=200)
+    parser.add_argument("--drones", type=int, default=10)
+    parser.add_argument("--bills", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", help="write this run's results as a baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed regression, as a fraction")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="fail when more requests error than this")
+    args = parser.parse_args()
+    args.mix_text = args.mix
+    args.mix = parse_mix(args.mix)
+    main(args)
@@ -0,0 +1,90 @@
+"""
+Login storm benchmark - measures latency of an unrelated endpoint while
+bcrypt verifications run concurrently in the same event loop.
+
+Compares the blocking verify_password with verify_password_async (bcrypt pool).
+No database is needed: the probe hits GET / through the ASGI app in-process,
+repeatedly, for as long as the storm is running.
+
+Usage:
+    python3 benchmarks/login_storm.py --logins 200
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import httpx
+from app.main import app
+from app.security.hash import hash_password, verify_password, verify_password_async
+
+PASSWORD = "password123"
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def login_storm(mode: str, stored_hash: str, logins: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one_login():
+        async with semaphore:
+            if mode == "blocking":
+                verify_password(PASSWORD, stored_hash)
+                await asyncio.sleep(0)  # yield like a real handler would after the DB call
+            else:
+                await verify_password_async(PASSWORD, stored_hash)
+
+    await asyncio.gather(*(one_login() for _ in range(logins)))
+
+async def probe(client: httpx.AsyncClient, storm: asyncio.Task, interval: float):
+    latencies = []
+    while not storm.done():
+        start = time.perf_counter()
+        response = await client.get("/")
+        latencies.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+        await asyncio.sleep(interval)
+    return latencies
+
+async def run(mode: str, logins: int, concurrency: int, interval: float):
+    stored_hash = hash_password(PASSWORD)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        storm = asyncio.create_task(login_storm(mode, stored_hash, logins, concurrency))
+        latencies = await probe(client, storm, interval)
+        await storm
+        elapsed = time.perf_counter() - start
+
+    return {
+        "mode": mode,
+        "logins/s": logins / elapsed,
+        "probes": len(latencies),
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": max(latencies),
+    }
+
+async def main(args):
+    print(f"{'mode':<10} {'logins/s':>9} {'probes':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for mode in ("blocking", "pool"):
+        result = await run(mode, args.logins, args.concurrency, args.interval)
+        print(
+            f"{result['mode']:<10} {result['logins/s']:>9.1f} {result['probes']:>7} {result['p50_ms']:>8.2f} "
+            f"{result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['max_ms']:>8.2f}"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Unrelated endpoint latency during a login storm")
+    parser.add_argument("--logins", type=int, default=200, help="bcrypt verifications in the storm")
+    parser.add_argument("--concurrency", type=int, default=50, help="concurrent logins in flight")
+    parser.add_argument("--interval", type=float, default=0.005, help="seconds between probes")
+    asyncio.run(main(parser.parse_args()))
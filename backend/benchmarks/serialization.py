@@ -0,0 +1,107 @@
+"""
+Serialization benchmark - compares the default response_model path with
+app.responses.fast_response for a page of billing and user documents, and
+checks that both produce the same JSON field for field.
+
+No database is needed; documents are generated in memory.
+
+Usage:
+    python3 benchmarks/serialization.py --rows 200 --repeat 200
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from bson import ObjectId
+from pydantic import TypeAdapter
+from starlette.responses import JSONResponse
+
+from app.responses import fast_response
+from app.schemas.billing import BillingResponse
+from app.schemas.users import UserResponse
+
+def billing_docs(rows: int):
+    start = datetime(2025, 1, 1)
+    return [
+        {
+            "_id": ObjectId(),
+            "farmer_id": str(ObjectId()),
+            "operator_id": str(ObjectId()),
+            "drone_id": str(ObjectId()),
+            "acres": round(random.uniform(1, 30), 2),
+            # Mongo hands back ints for whole numbers written by other clients
+            "time": random.choice([2, 2.5, 3.25]),
+            "amount": random.choice([3000, 4512.5]),
+            "mode_type": random.choice(["cash", "upi"]),
+            "created_at": start + timedelta(minutes=i, microseconds=123000),
+            "updated_at": None,
+            "created_by": str(ObjectId()),
+            "updated_by": None,
+            "changed_at": start,
+            **({"version": 3} if i % 2 else {}),
+        }
+        for i in range(rows)
+    ]
+
+def user_docs(rows: int):
+    return [
+        {
+            "_id": ObjectId(),
+            "name": f"Operator {i}",
+            "email": f"drone{i}@shamuga.com",
+            "role_id": 2,
+            "is_active": True,
+            "created_at": datetime(2025, 1, 1),
+        }
+        for i in range(rows)
+    ]
+
+def default_path(model, docs) -> bytes:
+    """What FastAPI does for response_model=List[model]: validate, dump by alias, json.dumps"""
+    adapter = TypeAdapter(List[model])
+    content = adapter.dump_python(adapter.validate_python(docs), mode="json", by_alias=True)
+    return JSONResponse(content).body
+
+def fast_path(model, docs) -> bytes:
+    return fast_response(model, docs).body
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+def main(args) -> int:
+    failed = False
+    for model, docs in ((BillingResponse, billing_docs(args.rows)), (UserResponse, user_docs(args.rows))):
+        expected = json.loads(default_path(model, docs))
+        actual = json.loads(fast_path(model, docs))
+        same = expected == actual and all(list(e) == list(a) for e, a in zip(expected, actual))
+        failed = failed or not same
+
+        default_ms = timed(lambda: default_path(model, docs), args.repeat)
+        fast_ms = timed(lambda: fast_path(model, docs), args.repeat)
+        print(
+            f"{model.__name__:<16} rows={args.rows} default={default_ms:.3f}ms "
+            f"fast={fast_ms:.3f}ms speedup={default_ms / fast_ms:.1f}x match={'yes' if same else 'NO'}"
+        )
+        if not same:
+            for e, a in zip(expected, actual):
+                if e != a:
+                    print(f"   expected {e}\n   actual   {a}")
+                    break
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="response_model vs fast_response serialization")
+    parser.add_argument("--rows", type=int, default=200, help="documents per page")
+    parser.add_argument("--repeat", type=int, default=200, help="timed iterations per path")
+    sys.exit(main(parser.parse_args()))
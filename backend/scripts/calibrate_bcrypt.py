@@ -0,0 +1,67 @@
+"""
+bcrypt calibration script - times hashing at increasing cost factors on this
+machine and recommends the highest BCRYPT_ROUNDS within a latency budget.
+
+Run it on the hardware the API runs on. Verifying a password costs the same
+as hashing it, so the budget is roughly the bcrypt share of a login.
+
+Usage:
+    python3 scripts/calibrate_bcrypt.py                  # 250 ms budget
+    python3 scripts/calibrate_bcrypt.py --target-ms 100 --samples 5
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import bcrypt
+from app.config import settings
+
+def time_hash(rounds: int, samples: int) -> float:
+    """Median milliseconds to hash a password at this cost"""
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        bcrypt.hashpw(b"calibration-password", bcrypt.gensalt(rounds=rounds))
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def calibrate(args) -> int:
+    print(f"⏱️  Target: {args.target_ms:.0f} ms per hash, median of {args.samples} samples")
+    print(f"   Current BCRYPT_ROUNDS={settings.BCRYPT_ROUNDS}, HASH_POOL_SIZE={settings.HASH_POOL_SIZE}\n")
+    print(f"{'rounds':>6} {'ms':>9} {'logins/s':>9}")
+
+    chosen = None
+    for rounds in range(args.min_rounds, args.max_rounds + 1):
+        ms = time_hash(rounds, args.samples)
+        # The hash pool runs HASH_POOL_SIZE verifications in parallel
+        print(f"{rounds:>6} {ms:>9.1f} {settings.HASH_POOL_SIZE * 1000 / ms:>9.1f}")
+        if ms > args.target_ms:
+            break
+        chosen = rounds
+
+    if chosen is None:
+        print(f"\n❌ Even {args.min_rounds} rounds exceed {args.target_ms:.0f} ms on this machine")
+        return 1
+
+    print(f"\n✅ Recommended: BCRYPT_ROUNDS={chosen}")
+    if chosen != settings.BCRYPT_ROUNDS:
+        print("💡 Existing users are rehashed at the new cost on their next login")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pick the bcrypt cost that fits a latency budget")
+    parser.add_argument("--target-ms", type=float, default=250, help="latency budget for one hash")
+    parser.add_argument("--samples", type=int, default=3, help="hashes timed per cost factor")
+    parser.add_argument("--min-rounds", type=int, default=10)
+    parser.add_argument("--max-rounds", type=int, default=16)
+    args = parser.parse_args()
+    if not 4 <= args.min_rounds <= args.max_rounds <= 31:
+        parser.error("rounds must satisfy 4 <= --min-rounds <= --max-rounds <= 31")
+    if args.samples < 1:
+        parser.error("--samples must be at least 1")
+    sys.exit(calibrate(args))
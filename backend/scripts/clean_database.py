@@ -1,9 +1,19 @@
 """
-Clean database script - removes all data from MongoDB collections
-WARNING: This will delete ALL data from the database!
+Clean database script - removes data from MongoDB collections
+WARNING: Without options this will delete ALL data from the database!
+
+Usage:
+    python3 scripts/clean_database.py                               # delete every document
+    python3 scripts/clean_database.py --reset                       # drop and recreate collections + indexes
+    python3 scripts/clean_database.py --purge-before 2024-01-01     # delete older bills in batches
+    python3 scripts/clean_database.py --archive-before 2024-01-01   # move older bills to billing_YYYY_MM
+    python3 scripts/clean_database.py --tier --yes                  # archive all but BILLING_HOT_MONTHS months
 """
+import argparse
 import asyncio
 import sys
+import time
+from datetime import datetime
 from pathlib import Path
 
 # Add parent directory to path
@@ -11,45 +21,134 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.config import settings
+from app.indexes import ensure_indexes
+from app.services.partition_service import list_billing_archives, tier_cutoff
+from app.services.retention_service import count_old_billings, drop_expired_archives, move_old_billings
+
+COLLECTIONS = [
+    "roles",
+    "users",
+    "drone_details",
+    "farmers",
+    "billing",
+    "billing_deletions",
+    "billing_daily_rollups",
+    "password_resets",
+    "rate_limits",
+    "maintenance_progress",
+]
+
+def confirm(prompt: str, expected: str, assume_yes: bool) -> bool:
+    if assume_yes:
+        return True
+    return input(f"\nType '{expected}' to confirm {prompt}: ") == expected
+
+async def delete_documents(db):
+    """Delete all documents from each collection (one oplog entry per document)"""
+    for collection_name in COLLECTIONS:
+        result = await db[collection_name].delete_many({})
+        print(f"   ✅ Deleted {result.deleted_count} documents from {collection_name}")
+
+async def reset_collections(db):
+    """Drop each collection and recreate it empty with its declared indexes"""
+    archives = await list_billing_archives(db)
+    for collection_name in COLLECTIONS + archives:
+        await db.drop_collection(collection_name)
+        print(f"   ✅ Dropped {collection_name}")
+    for collection_name in COLLECTIONS:
+        await db.create_collection(collection_name)
+    await ensure_indexes(db)
+    print(f"   ✅ Recreated {len(COLLECTIONS)} collections with their indexes")
+
+async def trim_billing(db, mode: str, cutoff: datetime, batch_size: int, pause: float):
+    started = time.perf_counter()
+
+    def report(processed):
+        rate = processed / max(time.perf_counter() - started, 1e-9)
+        print(f"   … {processed} bills {mode}d ({rate:,.0f}/s)", flush=True)
+
+    result = await move_old_billings(db, cutoff, mode, batch_size=batch_size, pause=pause, on_batch=report)
+    if result["resumed_from"]:
+        print(f"   ↪️  Resumed job {result['job_id']} after {result['resumed_from']} bills")
+    print(f"   ✅ {result['processed']} bills {mode}d in total")
 
-async def clean_database():
-    """Remove all data from all collections"""
-    
+    if mode == "purge":
+        dropped = await drop_expired_archives(db, cutoff)
+        for name in dropped:
+            print(f"   ✅ Dropped archive {name}")
+
+async def clean_database(args):
     # Connect to MongoDB
     client = AsyncIOMotorClient(settings.MONGO_URL)
     db = client[settings.DB_NAME]
-    
-    print("⚠️  WARNING: This will delete ALL data from the database!")
     print(f"Database: {settings.DB_NAME}")
-    
-    # Ask for confirmation
-    confirmation = input("\nType 'DELETE ALL' to confirm: ")
-    
-    if confirmation != "DELETE ALL":
-        print("❌ Operation cancelled")
+
+    try:
+        if args.tier:
+            args.archive_before = tier_cutoff(datetime.utcnow(), settings.BILLING_HOT_MONTHS)
+            print(f"🧊 Keeping {settings.BILLING_HOT_MONTHS} months hot")
+
+        if args.purge_before or args.archive_before:
+            mode = "purge" if args.purge_before else "archive"
+            cutoff = args.purge_before or args.archive_before
+            matching = await count_old_billings(db, cutoff)
+            print(f"📦 {matching} bills created before {cutoff.date()} would be {mode}d")
+            if args.dry_run:
+                return
+            if not matching and mode == "archive":
+                print("✅ Nothing to archive")
+                return
+            if not confirm(f"the {mode}", mode.upper(), args.yes):
+                print("❌ Operation cancelled")
+                return
+            print(f"\n🧹 {mode.capitalize()} in batches of {args.batch_size}, pausing {args.pause}s between batches...")
+            await trim_billing(db, mode, cutoff, args.batch_size, args.pause)
+            print(f"\n✨ {mode.capitalize()} completed successfully!")
+            return
+
+        print("⚠️  WARNING: This will delete ALL data from the database!")
+        if args.dry_run:
+            for collection_name in COLLECTIONS + await list_billing_archives(db):
+                print(f"   {collection_name}: {await db[collection_name].estimated_document_count()} documents")
+            return
+
+        # Ask for confirmation
+        if not confirm("", "DELETE ALL", args.yes):
+            print("❌ Operation cancelled")
+            return
+
+        print("\n🗑️  Cleaning database...")
+        if args.reset:
+            await reset_collections(db)
+        else:
+            await delete_documents(db)
+
+        print("\n✨ Database cleaned successfully!")
+        print("\n💡 Tip: Run 'python3 scripts/seed_data.py' to populate with sample data")
+    finally:
         client.close()
-        return
-    
-    print("\n🗑️  Cleaning database...")
-    
-    # Delete all documents from each collection
-    collections = [
-        "roles",
-        "users",
-        "drone_details",
-        "farmers",
-        "billing",
-        "password_resets"
-    ]
-    
-    for collection_name in collections:
-        result = await db[collection_name].delete_many({})
-        print(f"   ✅ Deleted {result.deleted_count} documents from {collection_name}")
-    
-    print("\n✨ Database cleaned successfully!")
-    print("\n💡 Tip: Run 'python3 scripts/seed_data.py' to populate with sample data")
-    
-    client.close()
+
+def parse_day(value: str) -> datetime:
+    return datetime.strptime(value, "%Y-%m-%d")
 
 if __name__ == "__main__":
-    asyncio.run(clean_database())
+    parser = argparse.ArgumentParser(description="Remove data from the database")
+    modes = parser.add_mutually_exclusive_group()
+    modes.add_argument("--reset", action="store_true",
+                       help="drop and recreate every collection with its indexes (fast, compacts indexes)")
+    modes.add_argument("--purge-before", type=parse_day, metavar="YYYY-MM-DD",
+                       help="delete bills created before this day, and archives of earlier months")
+    modes.add_argument("--archive-before", type=parse_day, metavar="YYYY-MM-DD",
+                       help="move bills created before this day into monthly billing_YYYY_MM collections")
+    modes.add_argument("--tier", action="store_true",
+                       help="archive bills older than the BILLING_HOT_MONTHS most recent months")
+    parser.add_argument("--batch-size", type=int, default=1000, help="bills per purge/archive batch")
+    parser.add_argument("--pause", type=float, default=0.5, help="seconds to sleep between purge/archive batches")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be removed")
+    parser.add_argument("--yes", action="store_true", help="do not ask for confirmation")
+    args = parser.parse_args()
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+    if args.tier and settings.BILLING_HOT_MONTHS < 1:
+        parser.error("--tier needs BILLING_HOT_MONTHS set to at least 1")
+    asyncio.run(clean_database(args))
@@ -0,0 +1,237 @@
+"""
+Synthetic data generator for capacity testing
+Creates operators, drones, farmers and any number of billing records with
+realistic distributions, loading bills from parallel worker processes.
+
+Usage:
+    python3 scripts/generate_data.py --farmers 50000 --bills 5000000 --operators 200 --seed 42
+    python3 scripts/generate_data.py --bills 100000 --drop --rollups
+"""
+import argparse
+import asyncio
+import math
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from itertools import accumulate
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.config import settings
+from app.security.hash import hash_password
+from app.indexes import ensure_indexes
+from app.services.rollup_service import rebuild_rollups
+
+GENERATED_COLLECTIONS = ["users", "drone_details", "farmers", "billing", "billing_deletions", "billing_daily_rollups"]
+# (model, per_hour_rate, acres sprayed per hour)
+DRONE_MODELS = [
+    ("DJI Agras T20", 1200.0, 3.5),
+    ("DJI Agras T30", 1500.0, 4.5),
+    ("XAG P100", 1800.0, 5.0),
+    ("DJI Agras T40", 2000.0, 6.0),
+]
+# Relative spraying activity per month (Jan..Dec): kharif Jun-Oct, rabi Nov-Feb
+MONTH_WEIGHTS = [0.9, 0.8, 0.5, 0.4, 0.5, 1.0, 1.3, 1.4, 1.3, 1.1, 1.0, 1.0]
+UPI_SHARE = 0.65
+
+def skewed_weights(rng: random.Random, count: int):
+    """A few busy records and a long tail, like real operators and farmers."""
+    return [rng.paretovariate(1.5) for _ in range(count)]
+
+def day_cum_weights(days: int, now: datetime):
+    weights = [MONTH_WEIGHTS[(now - timedelta(days=d)).month - 1] for d in range(days)]
+    return list(accumulate(weights))
+
+def make_bills(rng: random.Random, count: int, refs: dict, now: datetime):
+    """One batch of billing documents drawn from the reference distributions."""
+    operators = rng.choices(refs["operator_ids"], cum_weights=refs["operator_cum"], k=count)
+    farmers = rng.choices(refs["farmer_ids"], cum_weights=refs["farmer_cum"], k=count)
+    day_offsets = rng.choices(range(len(refs["day_cum"])), cum_weights=refs["day_cum"], k=count)
+    drones = refs["drones"]
+    docs = []
+    for operator_id, farmer_id, day in zip(operators, farmers, day_offsets):
+        # Operators mostly fly their own drone
+        if rng.random() < 0.8:
+            drone_id = refs["primary_drone"][operator_id]
+        else:
+            drone_id = rng.choice(refs["drone_ids"])
+        rate, coverage = drones[drone_id]
+        acres = round(min(100.0, max(0.5, rng.lognormvariate(math.log(5), 0.7))), 2)
+        hours = round(max(0.25, acres / coverage * rng.uniform(0.85, 1.3)), 2)
+        # Amount tracks the drone's hourly rate, with small discounts and rounding to 10
+        amount = max(10.0, round(hours * rate * rng.uniform(0.9, 1.05), -1))
+        created_at = (now - timedelta(days=day)).replace(
+            hour=rng.randint(6, 17), minute=rng.randint(0, 59), second=rng.randint(0, 59), microsecond=0
+        )
+        docs.append({
+            "farmer_id": farmer_id,
+            "operator_id": operator_id,
+            "drone_id": drone_id,
+            "acres": acres,
+            "time": hours,
+            "amount": amount,
+            "mode_type": "upi" if rng.random() < UPI_SHARE else "cash",
+            "created_at": created_at,
+            "updated_at": None,
+            "created_by": operator_id,
+            "updated_by": None,
+            "changed_at": created_at,
+            "version": 1,
+        })
+    return docs
+
+async def insert_bills(mongo_url: str, db_name: str, worker: int, count: int, seed: int,
+                       batch_size: int, refs: dict, now: datetime) -> int:
+    """Generate the next batch while the previous insert_many is in flight."""
+    rng = random.Random(seed * 1000 + worker)
+    client = AsyncIOMotorClient(mongo_url)
+    collection = client[db_name].billing
+    pending = None
+    inserted = 0
+    try:
+        remaining = count
+        while remaining > 0:
+            docs = make_bills(rng, min(batch_size, remaining), refs, now)
+            remaining -= len(docs)
+            if pending is not None:
+                inserted += len((await pending).inserted_ids)
+            pending = asyncio.ensure_future(collection.insert_many(docs, ordered=False))
+        if pending is not None:
+            inserted += len((await pending).inserted_ids)
+    finally:
+        client.close()
+    return inserted
+
+def run_worker(job):
+    """Process entry point: one event loop and one client per worker."""
+    return asyncio.run(insert_bills(*job))
+
+async def insert_in_batches(collection, docs, batch_size):
+    ids = []
+    for start in range(0, len(docs), batch_size):
+        ids.extend((await collection.insert_many(docs[start:start + batch_size], ordered=False)).inserted_ids)
+    return ids
+
+async def generate(args):
+    client = AsyncIOMotorClient(settings.MONGO_URL)
+    db = client[settings.DB_NAME]
+    rng = random.Random(args.seed)
+    now = datetime.utcnow()
+
+    if args.drop:
+        print("🗑️  Dropping generated collections...")
+        for name in GENERATED_COLLECTIONS:
+            await db.drop_collection(name)
+
+    # Hash once; every synthetic user shares the password
+    password_hash = hash_password(args.password)
+
+    print(f"👥 Creating {args.operators} operators...")
+    operators = [
+        {
+            "name": f"Operator {i}",
+            "email": f"op{i}.s{args.seed}@example.com",
+            "password": password_hash,
+            "role_id": 2,
+            "is_active": True,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(args.operators)
+    ]
+    operator_ids = [str(_id) for _id in await insert_in_batches(db.users, operators, args.batch_size)]
+
+    print(f"🚁 Creating {args.drones} drones...")
+    drone_docs = []
+    for i in range(args.drones):
+        name, rate, coverage = rng.choice(DRONE_MODELS)
+        drone_docs.append({
+            "name": name,
+            "model": name.split()[-1],
+            "serial_number": f"SYN-{args.seed}-{i:05d}",
+            "per_hour_rate": rate,
+            "created_at": now,
+            "updated_at": now,
+            "_coverage": coverage,
+        })
+    coverages = [doc.pop("_coverage") for doc in drone_docs]
+    drone_ids = [str(_id) for _id in await insert_in_batches(db.drone_details, drone_docs, args.batch_size)]
+
+    print(f"🌾 Creating {args.farmers} farmers...")
+    farmers = [
+        {
+            "name": f"Farmer {i}",
+            "number": f"+91 9{rng.randint(0, 999999999):09d}",
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(args.farmers)
+    ]
+    farmer_ids = [str(_id) for _id in await insert_in_batches(db.farmers, farmers, args.batch_size)]
+
+    refs = {
+        "operator_ids": operator_ids,
+        "operator_cum": list(accumulate(skewed_weights(rng, len(operator_ids)))),
+        "farmer_ids": farmer_ids,
+        "farmer_cum": list(accumulate(skewed_weights(rng, len(farmer_ids)))),
+        "drone_ids": drone_ids,
+        "drones": {
+            drone_id: (doc["per_hour_rate"], coverage)
+            for drone_id, doc, coverage in zip(drone_ids, drone_docs, coverages)
+        },
+        "primary_drone": {operator_id: rng.choice(drone_ids) for operator_id in operator_ids},
+        "day_cum": day_cum_weights(args.days, now),
+    }
+
+    print(f"💰 Loading {args.bills} bills with {args.workers} workers (batches of {args.batch_size})...")
+    shares = [args.bills // args.workers + (1 if w < args.bills % args.workers else 0) for w in range(args.workers)]
+    jobs = [
+        (settings.MONGO_URL, settings.DB_NAME, worker, share, args.seed, args.batch_size, refs, now)
+        for worker, share in enumerate(shares) if share
+    ]
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    with ProcessPoolExecutor(max_workers=len(jobs) or 1) as pool:
+        inserted = sum(await asyncio.gather(*(loop.run_in_executor(pool, run_worker, job) for job in jobs)))
+    elapsed = time.perf_counter() - started
+    print(f"✅ Inserted {inserted} bills in {elapsed:.1f}s ({inserted / max(elapsed, 1e-9):,.0f} docs/s)")
+
+    # Indexes are built after the load, which is faster than maintaining them per insert
+    print("🔍 Creating indexes...")
+    await ensure_indexes(db)
+    print("✅ Created indexes")
+
+    if args.rollups:
+        print("📊 Rebuilding billing_daily_rollups...")
+        await rebuild_rollups(db)
+        print("✅ Rebuilt rollups")
+
+    print("\n🔐 Operators log in as op<N>.s{seed}@example.com / {password}".format(
+        seed=args.seed, password=args.password
+    ))
+    client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic data for capacity testing")
+    parser.add_argument("--farmers", type=int, default=1000)
+    parser.add_argument("--bills", type=int, default=100000)
+    parser.add_argument("--operators", type=int, default=20)
+    parser.add_argument("--drones", type=int, default=None, help="default: one per two operators")
+    parser.add_argument("--days", type=int, default=730, help="spread bills over this many past days")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--password", default="password123", help="password shared by all generated users")
+    parser.add_argument("--workers", type=int, default=4, help="parallel processes loading bills")
+    parser.add_argument("--batch-size", type=int, default=10000, help="documents per insert_many")
+    parser.add_argument("--drop", action="store_true", help="drop the generated collections first")
+    parser.add_argument("--rollups", action="store_true", help="rebuild billing_daily_rollups afterwards")
+    args = parser.parse_args()
+    if args.drones is None:
+        args.drones = max(1, args.operators // 2)
+    if min(args.operators, args.farmers, args.drones, args.workers, args.batch_size, args.days) < 1:
+        parser.error("--operators, --farmers, --drones, --workers, --batch-size and --days must be at least 1")
+    asyncio.run(generate(args))
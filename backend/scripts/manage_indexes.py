@@ -0,0 +1,55 @@
+"""
+Index management script - builds the indexes declared in app/models
+and reports drift between the declarations and the database.
+
+Usage:
+    python3 scripts/manage_indexes.py            # create missing indexes
+    python3 scripts/manage_indexes.py --dry-run  # only report drift
+    python3 scripts/manage_indexes.py --check    # also explain() service queries
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.config import settings
+from app.indexes import ensure_indexes, index_drift, check_query_plans
+
+async def manage_indexes(dry_run: bool, check: bool) -> int:
+    """Returns a non-zero exit code when drift or a COLLSCAN remains"""
+    client = AsyncIOMotorClient(settings.MONGO_URL)
+    db = client[settings.DB_NAME]
+    failed = False
+
+    print(f"Database: {settings.DB_NAME}")
+    report = await (index_drift(db) if dry_run else ensure_indexes(db))
+
+    print("\n🔍 Index drift:")
+    for collection, drift in report.items():
+        problems = {kind: names for kind, names in drift.items() if names}
+        if problems:
+            failed = failed or bool(problems.get("missing") or problems.get("changed"))
+            print(f"   ⚠️  {collection}: {problems}")
+        else:
+            print(f"   ✅ {collection}")
+
+    if check:
+        print("\n📈 Query plans:")
+        for label, result in (await check_query_plans(db)).items():
+            marker = "❌" if result["collscan"] else "✅"
+            failed = failed or result["collscan"]
+            print(f"   {marker} {label}: {', '.join(result['stages'])}")
+
+    client.close()
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create declared MongoDB indexes and report drift")
+    parser.add_argument("--dry-run", action="store_true", help="report drift without creating indexes")
+    parser.add_argument("--check", action="store_true", help="explain() service queries and flag COLLSCANs")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(manage_indexes(args.dry_run, args.check)))
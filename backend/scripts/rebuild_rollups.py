@@ -0,0 +1,57 @@
+"""
+Billing rollup script - rebuilds billing_daily_rollups from the billing
+collection, or checks that the incrementally maintained rollups still match.
+
+Usage:
+    python3 scripts/rebuild_rollups.py                                   # rebuild everything
+    python3 scripts/rebuild_rollups.py --from 2025-01-01 --to 2025-03-31 # rebuild a day range
+    python3 scripts/rebuild_rollups.py --check                           # report mismatches only
+"""
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.config import settings
+from app.indexes import ensure_indexes
+from app.services.rollup_service import rebuild_rollups, check_rollups
+
+async def run(start, end, check_only: bool) -> int:
+    client = AsyncIOMotorClient(settings.MONGO_URL)
+    db = client[settings.DB_NAME]
+    span = f"{start.date() if start else 'beginning'} → {end.date() if end else 'today'}"
+    print(f"Database: {settings.DB_NAME} ({span})")
+
+    if not check_only:
+        # $merge needs the unique rollup key index
+        await ensure_indexes(db)
+        print("🔄 Rebuilding rollups...")
+        written = await rebuild_rollups(db, start, end)
+        print(f"   ✅ Wrote {written} rollup rows")
+
+    print("🔍 Checking rollups against billing...")
+    report = await check_rollups(db, start, end)
+    for mismatch in report["mismatches"][:20]:
+        print(f"   ❌ {mismatch['key']}: expected {mismatch['expected']}, found {mismatch['actual']}")
+    if len(report["mismatches"]) > 20:
+        print(f"   ... and {len(report['mismatches']) - 20} more")
+    print(f"   {report['checked']} keys checked, {len(report['mismatches'])} mismatches")
+
+    client.close()
+    return 1 if report["mismatches"] else 0
+
+def parse_day(value: str) -> datetime:
+    return datetime.strptime(value, "%Y-%m-%d")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild or verify billing_daily_rollups")
+    parser.add_argument("--from", dest="start", type=parse_day, help="first day (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="end", type=parse_day, help="last day, inclusive (YYYY-MM-DD)")
+    parser.add_argument("--check", action="store_true", help="only compare, do not rebuild")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.start, args.end, args.check)))
@@ -12,6 +12,7 @@ sys.path.append(str(Path(__file__).parent.parent))
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.config import settings
 from app.security.hash import hash_password
+from app.indexes import ensure_indexes
 from datetime import datetime
 
 async def seed_database():
@@ -266,11 +267,7 @@ async def seed_database():
     
     # Create indexes for better performance
     print("🔍 Creating indexes...")
-    await db.users.create_index("email", unique=True)
-    await db.drone_details.create_index("serial_number", unique=True)
-    await db.roles.create_index("name", unique=True)
-    await db.password_resets.create_index("token")
-    await db.password_resets.create_index("expires_at", expireAfterSeconds=0)
+    await ensure_indexes(db)
     print("✅ Created indexes")
     
     print("\n" + "="*50)
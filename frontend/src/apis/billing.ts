@@ -12,8 +12,19 @@ export interface BillingResponse {
     created_at: string;
     updated_at: string | null;
     created_by: string | null;
+    // Present only when requested with ?expand=
+    farmer?: ExpandedReference | null;
+    operator?: ExpandedReference | null;
+    drone?: ExpandedReference | null;
 }
 
+export interface ExpandedReference {
+    _id: string;
+    name: string | null;
+}
+
+export type BillingExpansion = 'farmer' | 'operator' | 'drone';
+
 export interface BillingCreate {
     farmer_id: string;
     operator_id: string;
@@ -24,21 +35,55 @@ export interface BillingCreate {
     mode_type: 'cash' | 'upi';
 }
 
+export interface SummaryFieldStats {
+    sum: number;
+    avg: number;
+}
+
+export interface BillingSummaryStats {
+    count: number;
+    amount: SummaryFieldStats;
+    acres: SummaryFieldStats;
+    time: SummaryFieldStats;
+}
+
+export type SummaryGroupBy = 'month' | 'operator' | 'drone' | 'mode_type';
+
+export interface BillingSummaryResponse {
+    group_by: SummaryGroupBy | null;
+    totals: BillingSummaryStats;
+    groups: (BillingSummaryStats & { key: string | null })[];
+}
+
 export const billsApi = {
     create: (data: BillingCreate) => client('/billing/', { body: data }),
 
     // Get all bills (with optional filtering)
-    getAll: (filters?: { farmer_id?: string; operator_id?: string; drone_id?: string }) => {
+    getAll: (filters?: { farmer_id?: string; operator_id?: string; drone_id?: string }, expand?: BillingExpansion[]) => {
         const params = new URLSearchParams();
         if (filters) {
             if (filters.farmer_id) params.append('farmer_id', filters.farmer_id);
             if (filters.operator_id) params.append('operator_id', filters.operator_id);
             if (filters.drone_id) params.append('drone_id', filters.drone_id);
         }
+        if (expand?.length) params.append('expand', expand.join(','));
         const queryString = params.toString();
         return client(`/billing/${queryString ? `?${queryString}` : ''}`);
     },
 
+    // Server-side totals/averages, optionally grouped
+    getSummary: (groupBy?: SummaryGroupBy, filters?: { farmer_id?: string; operator_id?: string; drone_id?: string }): Promise<BillingSummaryResponse> => {
+        const params = new URLSearchParams();
+        if (groupBy) params.append('group_by', groupBy);
+        if (filters) {
+            if (filters.farmer_id) params.append('farmer_id', filters.farmer_id);
+            if (filters.operator_id) params.append('operator_id', filters.operator_id);
+            if (filters.drone_id) params.append('drone_id', filters.drone_id);
+        }
+        const queryString = params.toString();
+        return client(`/billing/summary${queryString ? `?${queryString}` : ''}`);
+    },
+
     getById: (id: string) => client(`/billing/${id}`),
 
     update: (id: string, data: Partial<BillingCreate>) => client(`/billing/${id}`, {
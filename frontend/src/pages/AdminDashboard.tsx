@@ -5,12 +5,13 @@ import { BillTable } from '../components/Bills/BillTable';
 import { BillFilters } from '../components/Bills/BillFilters';
 import { BillEditModal } from '../components/Bills/BillEditModal';
 import { BillViewModal } from '../components/Bills/BillViewModal';
-import { BillingResponse, billsApi } from '../apis/billing';
+import { BillingResponse, BillingSummaryResponse, billsApi } from '../apis/billing';
 import { theme } from '../theme';
 
 export function AdminDashboard() {
   const [bills, setBills] = useState<BillingResponse[]>([]);
   const [filteredBills, setFilteredBills] = useState<BillingResponse[]>([]);
+  const [summary, setSummary] = useState<BillingSummaryResponse | null>(null);
   const [loading, setLoading] = useState(true);
   const [refreshing, setRefreshing] = useState(false);
   const [editingBill, setEditingBill] = useState<BillingResponse | null>(null);
@@ -31,8 +32,10 @@ export function AdminDashboard() {
       } else {
         setLoading(true);
       }
-      const data = await billsApi.getAll();
+      // Card figures come from the server-side summary rather than totalling the list here
+      const [data, summaryData] = await Promise.all([billsApi.getAll(), billsApi.getSummary('month')]);
       setBills(data);
+      setSummary(summaryData);
       setFilteredBills(data);
       setSearchQuery('');
     } catch (error) {
@@ -151,35 +154,34 @@ export function AdminDashboard() {
   // Calculate stats
   const { totalBills, totalAmount, avgAmount, monthlyIncome, monthlyBillCount, currentMonthName } = useMemo(() => {
     const currentDate = new Date();
-    const currentMonth = currentDate.getMonth();
-    const currentYear = currentDate.getFullYear();
     const monthNames = ["January", "February", "March", "April", "May", "June",
       "July", "August", "September", "October", "November", "December"];
 
-    const monthlyBills = bills.filter(bill => {
-      const billDate = new Date(bill.created_at);
-      return billDate.getMonth() === currentMonth && billDate.getFullYear() === currentYear;
-    });
-
-    const monthlyIncome = monthlyBills.reduce((sum, bill) => sum + bill.amount, 0);
-    const monthlyBillCount = monthlyBills.length;
+    // Summary months are "YYYY-MM" in UTC, the same as the stored created_at
+    const currentMonthKey = currentDate.toISOString().slice(0, 7);
+    const currentMonthStats = summary?.groups.find(group => group.key === currentMonthKey);
 
     return {
-      totalBills: filteredBills.length,
-      totalAmount: filteredBills.reduce((sum, bill) => sum + bill.amount, 0),
-      avgAmount: filteredBills.length > 0 ? filteredBills.reduce((sum, bill) => sum + bill.amount, 0) / filteredBills.length : 0,
-      monthlyIncome,
-      monthlyBillCount,
-      currentMonthName: monthNames[currentMonth]
+      totalBills: summary?.totals.count ?? 0,
+      totalAmount: summary?.totals.amount.sum ?? 0,
+      avgAmount: summary?.totals.amount.avg ?? 0,
+      monthlyIncome: currentMonthStats?.amount.sum ?? 0,
+      monthlyBillCount: currentMonthStats?.count ?? 0,
+      currentMonthName: monthNames[currentDate.getUTCMonth()]
     };
-  }, [filteredBills, bills]);
+  }, [summary]);
+
+  const filteredAmount = useMemo(
+    () => filteredBills.reduce((sum, bill) => sum + bill.amount, 0),
+    [filteredBills]
+  );
 
   const stats = [
     {
       icon: FileText,
       label: 'Total Bills',
       value: totalBills.toLocaleString('en-IN'),
-      sublabel: `${bills.length} total records`,
+      sublabel: `${filteredBills.length} shown below`,
       color: theme.colors.primary.cyan[400],
       bgColor: 'rgba(6, 182, 212, 0.15)',
     },
@@ -502,7 +504,7 @@ export function AdminDashboard() {
                     </div>
                     <div className="flex items-center gap-2">
                       <span className="text-sm px-3 py-1 rounded-full bg-cyan-500/10 text-cyan-300">
-                        ₹{totalAmount.toLocaleString('en-IN')} total
+                        ₹{filteredAmount.toLocaleString('en-IN')} total
                       </span>
                     </div>
                   </div>